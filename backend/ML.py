@@ -1,134 +1,320 @@
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.neighbors import NearestNeighbors
 from neo4j_driver import *
 from utils import *
-from datetime import datetime
+from data_version import current_data_version
+from model_cache import peer_models
+from single_flight import coalesced, single_flight
+from timing import span
+from course_matrix import CourseMatrix
+from peer_index import make_index
+from course_catalog import get_catalog
+from dataclasses import dataclass, replace
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional
+
+FEATURE_COLUMNS = [
+    "s.learningStyle", "s.preferredCourseLoad", "s.preferredPace", "s.workHoursPerWeek",
+    "s.financialAidStatus", "s.preferredInstructionMode"
+]
 
 def flatten_records(records):
     data = []
     for record in records:
-        courses, gpa_dict, student = record[0], record[1], record[2]
         row = {}
         # Student attributes
-        student = student[0]
-        row.update(student)
-        # GPA
-        row["GPA"] = gpa_dict[0]["GPA"]
-        # Encode course history as a joined string
-        row["course_path"] = " ".join([c["course_id"] for c in courses])
+        row.update({column: record[column] for column in FEATURE_COLUMNS})
         data.append(row)
     return pd.DataFrame(data)
 
 # -----------------------------
-# Connect to Neo4j + load data
+# Peer-based recommendation
 # -----------------------------
-def predict(name: str):
-    neo = Neo4jDriver()
-    neo.connect()
-
-    id = find_student_id(neo, name)
-    degree = find_student_degree(neo, id)
-    alumni = find_alumni_that_finished_from_same_degree(neo, degree)
-
-    paths = []
-    for alumnus in alumni:
-        student_id = alumnus["alumni.id"]
-        path = find_path_of_alumnus(neo, student_id)
-        if path is not None:
-            paths.append([
-                sort_courses_dict(path),
-                get_students_GPA_from_id(neo, student_id),
-                get_student_features_from_id(neo, student_id)
-            ])
-    records = paths
-    df = flatten_records(records)
-    #print("Training dataset:", df.head())
+categorical = ["s.learningStyle", "s.preferredPace",
+            "s.financialAidStatus", "s.preferredInstructionMode"]
+numeric = ["s.preferredCourseLoad", "s.workHoursPerWeek"]
 
-    # -----------------------------
-    # Peer-based recommendation
-    # -----------------------------
-    features = [
-        "s.learningStyle", "s.preferredPace",
-        "s.financialAidStatus", "s.preferredInstructionMode",
-        "s.preferredCourseLoad", "s.workHoursPerWeek"
-    ]
+# Degrees served from prebuilt artifacts (see artifacts.py): degree_id -> (data version, PeerModel).
+# Used only while the graph is still at that version; after that the degree is fitted like any other
+preloaded_models = {}
 
-    categorical = ["s.learningStyle", "s.preferredPace",
-                "s.financialAidStatus", "s.preferredInstructionMode"]
-    numeric = ["s.preferredCourseLoad", "s.workHoursPerWeek"]
+def fit_vocab(df: pd.DataFrame) -> Dict[str, List[str]]:
+    return {column: sorted(df[column].dropna().unique().tolist()) for column in categorical}
 
-    preprocessor = ColumnTransformer([
-        ("cat", OneHotEncoder(handle_unknown="ignore"), categorical),
-        ("num", "passthrough", numeric)
-    ])
+def encode_features(df: pd.DataFrame, vocab: Dict[str, List[str]]) -> np.ndarray:
+    """One-hot the categorical columns against vocab (unknown values -> all zeros), then append the numeric ones."""
+    width = sum(len(vocab[column]) for column in categorical) + len(numeric)
+    out = np.zeros((len(df), width), dtype=np.float32)
+    offset = 0
+    for column in categorical:
+        index = {value: i for i, value in enumerate(vocab[column])}
+        positions = df[column].map(index)
+        known = positions.notna().to_numpy()
+        out[np.flatnonzero(known), offset + positions[known].to_numpy(dtype=np.int64)] = 1.0
+        offset += len(vocab[column])
+    out[:, offset:] = df[numeric].to_numpy(dtype=np.float32)
+    return out
 
-    peer_finder = Pipeline(steps=[
-        ("preprocessor", preprocessor),
-        ("nn", NearestNeighbors(n_neighbors=10, metric="cosine"))
-    ])
+@dataclass
+class PeerModel:
+    degree_id: str
+    vocab: Dict[str, List[str]]   # categories per categorical feature, in one-hot column order
+    matrix: np.ndarray            # float32 encoded alumni features
+    alumni_ids: np.ndarray        # row-aligned with matrix
+    courses: CourseMatrix         # course history + GPA per alumnus, row-aligned with matrix
+    index: Optional[Any] = None   # peer_index backend (exact or ANN), chosen by PEER_INDEX
+    as_of: Optional[date] = None  # alumni cut-off (graduated before this day) the rows reflect
 
-    peer_finder.fit(df[features])
+    def __post_init__(self):
+        if self.index is None:
+            self.index = make_index(len(self.matrix), n_neighbors=10).fit(self.matrix)
 
-    # -----------------------------
-    # Target student
-    # -----------------------------
-    student_features = get_student_features_from_id(neo, id)[0]
-    student_df = pd.DataFrame([student_features])
+    def nbytes(self) -> int:
+        return int(self.matrix.nbytes + self.alumni_ids.nbytes + self.courses.nbytes() + self.index.nbytes())
 
-    # Find nearest peers
-    distances, indices = peer_finder.named_steps["nn"].kneighbors(
-        peer_finder.named_steps["preprocessor"].transform(student_df)
-    )
-    peer_ids = indices[0]
-    peer_records = df.iloc[peer_ids]
+    def kneighbors(self, student_df: pd.DataFrame):
+        return self.index.kneighbors(encode_features(student_df, self.vocab))
 
-    # -----------------------------
-    # Rank courses by peer GPA
-    # -----------------------------
-    peer_courses = peer_records.assign(
-        course=peer_records["course_path"].str.split().apply(
-        lambda words: [ " ".join(words[i:i+2]) for i in range(0, len(words), 2) ]
-    )
-    ).explode("course")
+    def apply_updates(self, records, as_of: Optional[date] = None) -> Optional["PeerModel"]:
+        """
+        New model with training-set records (same shape as get_alumni_training_set)
+        merged in: known alumni IDs have their features, GPA and course history
+        replaced, unknown ones are appended. Existing rows are not re-encoded and
+        the index reuses its training. Returns None when a record carries a
+        categorical value outside the vocabulary, i.e. a full refit is needed.
+        """
+        if not records:
+            return replace(self, as_of=as_of or self.as_of)
+        df = flatten_records(records)
+        for column in categorical:
+            if not set(df[column].dropna()).issubset(self.vocab[column]):
+                return None
+
+        row_of = {alumnus_id: i for i, alumnus_id in enumerate(self.alumni_ids.tolist())}
+        rows = np.asarray([row_of.get(record["id"], -1) for record in records], dtype=np.int64)
+        encoded = encode_features(df, self.vocab)
+
+        matrix = np.array(self.matrix, dtype=np.float32)
+        matrix[rows[rows >= 0]] = encoded[rows >= 0]
+        matrix = np.vstack([matrix, encoded[rows < 0]])
+        alumni_ids = np.concatenate([
+            np.asarray(self.alumni_ids, dtype=str),
+            np.asarray([record["id"] for record, row in zip(records, rows) if row < 0], dtype=str),
+        ])
+        return PeerModel(
+            degree_id=self.degree_id,
+            vocab=self.vocab,
+            matrix=matrix,
+            alumni_ids=alumni_ids,
+            courses=self.courses.with_updates(records, rows),
+            index=self.index.updated(matrix),
+            as_of=as_of or self.as_of,
+        )
+
+def fit_peer_model(degree_id: str, records) -> PeerModel:
+    df = flatten_records(records)
+    #print("Training dataset:", df.head())
 
-    course_scores = (
-        peer_courses.groupby("course")["GPA"]
-        .mean()
-        .sort_values(ascending=False)
+    vocab = fit_vocab(df)
+    return PeerModel(
+        degree_id=degree_id,
+        vocab=vocab,
+        matrix=encode_features(df, vocab),
+        alumni_ids=np.asarray([record["id"] for record in records], dtype=str),
+        courses=CourseMatrix.from_records(records),
+        as_of=date.today(),
     )
 
-    # -----------------------------
-    # Filter out students's own courses
-    # -----------------------------
-    student_path = find_path_of_alumnus(neo, id)
-    student_path = set(c["course_id"] for c in student_path)
+def _fit_and_cache(neo, degree_id: str, version) -> PeerModel:
+    with span("training_set"):
+        records = get_alumni_training_set(neo, degree_id)
+    with span("fit"):
+        model = fit_peer_model(degree_id, records)
+    peer_models.put(degree_id, version, model, model.nbytes())
+    return model
 
+def get_peer_model(neo, degree_id: str) -> PeerModel:
+    """Fitted peer finder for a degree, rebuilt only when the graph data version changes."""
+    version = current_data_version(neo)
+    preloaded = preloaded_models.get(degree_id)
+    if preloaded is not None and preloaded[0] != version:
+        preloaded_models.pop(degree_id, None)  # built from an older graph
+        preloaded = None
+    model = preloaded[1] if preloaded is not None else peer_models.get(degree_id, version)
+    if model is None:
+        # Concurrent misses on a degree wait for one fit instead of each fitting
+        model = single_flight.do(("fit_peer_model", degree_id, version), _fit_and_cache, neo, degree_id, version)
+    elif model.as_of < date.today():
+        # Graduation is relative to date(): students who graduated since the model
+        # was built join as new alumni rows instead of forcing a refit
+        today = date.today()
+        delta = get_alumni_training_set(neo, degree_id, graduated_since=model.as_of.isoformat())
+        model = model.apply_updates(delta, as_of=today)
+        if model is None:
+            model = fit_peer_model(degree_id, get_alumni_training_set(neo, degree_id))
+        if preloaded is not None:
+            preloaded_models[degree_id] = (version, model)
+        else:
+            peer_models.put(degree_id, version, model, model.nbytes())
+    return model
 
-    recommended_courses = course_scores[~course_scores.index.isin(student_path)]
+def apply_alumni_updates(neo, student_ids):
+    """
+    Fold new/changed COMPLETED edges for the given alumni into already-built
+    models (cached or preloaded). Each model keeps the data version it was built
+    at: other changes may have landed since, so the next version check still
+    sees the gap and refits, while the patched model serves until then.
+    Returns {"updated": [...], "refit": [...], "skipped": [...]} degree IDs.
+    """
+    by_degree = {}
+    for profile in get_student_profiles(neo, student_ids, by="id"):
+        if profile["degree_id"]:
+            by_degree.setdefault(profile["degree_id"], []).append(profile["id"])
 
+    outcome = {"updated": [], "refit": [], "skipped": []}
+    for degree_id, ids in by_degree.items():
+        preloaded = preloaded_models.get(degree_id)
+        entry = preloaded if preloaded is not None else peer_models.peek(degree_id)
+        if entry is None:
+            # Nothing built yet; the next request fits from scratch anyway
+            outcome["skipped"].append(degree_id)
+            continue
+        version, model = entry
+        updated = model.apply_updates(get_alumni_training_set(neo, degree_id, student_ids=ids))
+        if updated is None:
+            updated = fit_peer_model(degree_id, get_alumni_training_set(neo, degree_id))
+            outcome["refit"].append(degree_id)
+        else:
+            outcome["updated"].append(degree_id)
+        if preloaded is not None:
+            preloaded_models[degree_id] = (version, updated)
+        else:
+            peer_models.put(degree_id, version, updated, updated.nbytes())
+    return outcome
+
+def semester_plan(end_date, top_k: Optional[int] = None):
     end_sem = ""
-    end_date = get_students_end_date_from_id(neo, id)
     if end_date.month < 6:
         end_sem = "Summer"
     else:
         end_sem = "Fall"
-    
+
     sem_list = []
     if end_sem == "Summer":
         sem_list = ["Fall2025", "Fall2025", "Fall2025", "Spring2026", "Spring2026", "Spring2026"]
     else :
         sem_list = ["Fall2025", "Fall2025", "Fall2025", "Spring2026", "Spring2026", "Spring2026", "Summer2026", "Summer2026", "Summer2026"]
+    return sem_list[:top_k]
+
+def rank_courses(model: PeerModel, peer_rows, completed, top_k: Optional[int] = None, min_support: int = 1):
+    # -----------------------------
+    # Rank courses by peer GPA
+    # -----------------------------
+    course_scores, support = model.courses.peer_scores(peer_rows)
+
+    # -----------------------------
+    # Filter out students's own courses
+    # -----------------------------
+    candidates = support >= max(min_support, 1)
+    candidates[model.courses.columns(completed)] = False
+
+    candidates = np.flatnonzero(candidates)
+    if top_k is not None and top_k < len(candidates):
+        # Partial selection: only the k best candidates get fully sorted
+        candidates = candidates[np.argpartition(-course_scores[candidates], top_k - 1)[:top_k]]
+    ranked = candidates[np.argsort(-course_scores[candidates], kind="stable")]
+    return model.courses.course_ids[ranked].tolist(), course_scores[ranked]
+
+def recommend_for_degree(neo, degree_id: str, profiles, top_k: Optional[int] = None, min_support: int = 1):
+    """
+    Recommendations for several students of the same degree: one model lookup,
+    one multi-row kneighbors call and local course-name lookups.
+    Returns (course_names, avg_score, sem_list) per profile, in order; with top_k
+    only the k best courses (taken by at least min_support peers) are named and averaged.
+    """
+    with span("model"):
+        model = get_peer_model(neo, degree_id)
+
+    # Find nearest peers for every target student at once
+    with span("neighbors"):
+        distances, indices = model.kneighbors(pd.DataFrame(profiles))
+
+    with span("rank"):
+        ranked = [
+            rank_courses(model, peer_rows, profile["completed"], top_k=top_k, min_support=min_support)
+            for profile, peer_rows in zip(profiles, indices)
+        ]
+    names = get_catalog(neo).names_for({course_id for course_ids, _ in ranked for course_id in course_ids})
+
+    results = []
+    for profile, (course_ids, scores) in zip(profiles, ranked):
+        results.append((
+            [names.get(course_id) for course_id in course_ids],
+            float(scores.mean()) if len(scores) else 0.0,
+            semester_plan(profile["graduation"], top_k),
+        ))
+    return results
+
+class StudentNotFound(LookupError):
+    """Unknown student (or one without a degree to take peers from); the API answers 404."""
+
+# -----------------------------
+# Connect to Neo4j + load data
+# -----------------------------
+@coalesced(ignore=())
+def predict(name: str, top_k: Optional[int] = None, min_support: int = 1):
+    neo = get_shared_driver()
+    with span("profile"):
+        profiles = get_student_profiles(neo, [name], by="name")
+    if not profiles:
+        raise StudentNotFound(f"Student not found: {name}")
+    profile = profiles[0]
+    if not profile["degree_id"]:
+        raise StudentNotFound(f"Student has no degree: {name}")
+    return recommend_for_degree(neo, profile["degree_id"], [profile], top_k=top_k, min_support=min_support)[0]
+
+def predict_batch(students, by: str = "name", top_k: Optional[int] = None, min_support: int = 1):
+    """
+    Yield one result dict per requested student, grouped by degree so each
+    degree's peer model is fitted (or fetched from cache) once per batch.
+    Unknown students and failed degrees yield {"student", "error"} instead.
+    """
+    neo = get_shared_driver()
+    profiles = {}
+    for profile in get_student_profiles(neo, students, by=by):
+        profiles.setdefault(profile["key"], profile)
 
+    by_degree = {}
+    for key in dict.fromkeys(students):
+        profile = profiles.get(key)
+        if profile is None:
+            yield {"student": key, "error": "Student not found"}
+        elif not profile["degree_id"]:
+            yield {"student": key, "error": "Student has no degree"}
+        else:
+            by_degree.setdefault(profile["degree_id"], []).append(profile)
 
-    course_ids = recommended_courses.keys().tolist()
-    
-    course_names = []
-    for course_id in course_ids:
-        course_names.append(course_name_from_id(neo, course_id))
+    for degree_id, group in by_degree.items():
+        try:
+            results = recommend_for_degree(neo, degree_id, group, top_k=top_k, min_support=min_support)
+        except Exception as e:
+            for profile in group:
+                yield {"student": profile["key"], "error": str(e)}
+            continue
+        for profile, (course_names, avg_score, sem_list) in zip(group, results):
+            yield {
+                "student": profile["key"],
+                "student_id": profile["id"],
+                "student_name": profile["name"],
+                "courses": course_names,
+                "avg_score": avg_score,
+                "sem_list": sem_list,
+            }
 
-    neo.close()
+def predict_batch_list(students, by: str = "name", top_k: Optional[int] = None, min_support: int = 1):
+    """predict_batch materialised, for running a chunk of a batch in a worker process."""
+    return list(predict_batch(students, by=by, top_k=top_k, min_support=min_support))
 
-    return course_names, sum(recommended_courses.tolist())/len(recommended_courses.tolist()), sem_list
+def refresh_alumni(student_ids):
+    """apply_alumni_updates on the process's shared driver, for running inside each worker process."""
+    return apply_alumni_updates(get_shared_driver(), student_ids)
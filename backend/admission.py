@@ -0,0 +1,135 @@
+"""
+Admission control for the expensive routes: per-route concurrency limits with a
+bounded FIFO wait queue and a queue-time deadline.
+
+A request that finds the queue full, or is still queued after its deadline, is
+answered at once with 503 and Retry-After instead of piling onto the threadpool
+or the ML pool, so cheap endpoints keep their latency while these saturate.
+The slot is held until the response (streamed bodies included) has been sent.
+
+Limits per route are "concurrency,queue,timeout_seconds", overridable with
+ADMISSION_<ROUTE> (e.g. ADMISSION_ML_RECOMMENDATIONS=4,16,2); "0" lifts the limit.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+from metrics import Counter, Histogram, add_collector
+import timing
+
+# Model fits are CPU-bound: running more at once than there are cores only slows everything else
+_CPUS = os.cpu_count() or 1
+DEFAULT_LIMITS = {
+    "/ml/recommendations": f"{_CPUS},{4 * _CPUS},2",
+    "/ml/recommendations/batch": "1,2,1",
+    "/ml/alumni/updates": "1,4,10",
+    "/ai/summary": "4,8,5",
+}
+
+ADMISSION_REJECTED = Counter("admission_rejected_total", "Requests shed with 503", ("route", "reason"))
+ADMISSION_QUEUE_MS = Histogram("admission_queue_ms", "Time admitted requests waited for a slot (ms)", ("route",))
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class RouteLimiter:
+    def __init__(self, route: str, concurrency: int, queue: int, timeout: float):
+        self.route = route
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = deque()
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout))
+
+    async def acquire(self):
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue:
+            raise Overloaded("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded("timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # handed a slot just as the client went away
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        # Hand the slot straight to the oldest live waiter, so active never dips below a full queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+def _parse(route: str, default: str):
+    env = "ADMISSION_" + route.strip("/").replace("/", "_").replace("-", "_").upper()
+    value = os.getenv(env, default)
+    if value.strip() == "0":
+        return None
+    concurrency, queue, timeout = value.split(",")
+    return RouteLimiter(route, int(concurrency), int(queue), float(timeout))
+
+def limiters_from_env(defaults=DEFAULT_LIMITS):
+    limiters = {}
+    for route, default in defaults.items():
+        limiter = _parse(route, default)
+        if limiter is not None:
+            limiters[route] = limiter
+    return limiters
+
+class AdmissionMiddleware:
+    """ASGI middleware applying a RouteLimiter per path (see module docstring)."""
+
+    def __init__(self, app, limiters=None):
+        self.app = app
+        self.limiters = limiters_from_env() if limiters is None else limiters
+        add_collector(self._gauges)
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.limiters.get(scope["path"]) if scope["type"] == "http" else None
+        if limiter is None:
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        try:
+            await limiter.acquire()
+        except Overloaded as e:
+            ADMISSION_REJECTED.inc(route=limiter.route, reason=e.reason)
+            response = JSONResponse(
+                {"detail": f"{limiter.route} is at capacity, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(limiter.retry_after)},
+            )
+            return await response(scope, receive, send)
+        queued_ms = (time.perf_counter() - started) * 1000
+        ADMISSION_QUEUE_MS.observe(queued_ms, route=limiter.route)
+        timing.add("queue", queued_ms)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def _gauges(self):
+        lines = ["# TYPE admission_active gauge"]
+        lines += [f'admission_active{{route="{route}"}} {l.active}' for route, l in sorted(self.limiters.items())]
+        lines.append("# TYPE admission_queued gauge")
+        lines += [f'admission_queued{{route="{route}"}} {len(l._waiters)}' for route, l in sorted(self.limiters.items())]
+        return lines
@@ -5,6 +5,8 @@ import os
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from timing import span
+
 load_dotenv()
 
 @dataclass
@@ -107,14 +109,16 @@ def _build_prompt(payload: Dict[str, Any]) -> List[Dict[str, str]]:
     ]
 
 def generate_summary(payload: Dict[str, Any]):
-    msgs = _build_prompt(payload)
+    with span("prompt"):
+        msgs = _build_prompt(payload)
     client = _client()
 
-    resp = client.chat.completions.create(
-        model=_model(),
-        messages=msgs,
-        temperature=0.4
-    )
+    with span("llm"):
+        resp = client.chat.completions.create(
+            model=_model(),
+            messages=msgs,
+            temperature=0.4
+        )
     content = resp.choices[0].message.content
     content = content.replace("\n", " ")
 
@@ -0,0 +1,166 @@
+"""
+Materialized per-course analytics, served from memory instead of scanning COMPLETED
+edges on every call:
+
+    (course, grade, learningStyle) -> students        learner_types_enrolled_in_a_course
+    (course, textbook, grade)      -> readers         textbooks_popularity_among_courses_groupped_by_grades
+    (course, grade)                -> total students
+
+Built in one pass over every COMPLETED edge, rebuilt when the graph data version
+moves, and patched per student by apply_student_updates when new completions arrive.
+Counts are of distinct students, as in the Cypher the two query functions used to run.
+"""
+import threading
+from collections import defaultdict
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+CUBE_ROWS_QUERY = """
+    MATCH (s:Student)-[g:COMPLETED]->(c:Course)
+    WHERE $student_ids IS NULL OR s.id IN $student_ids
+    RETURN s.id AS student_id,
+           s.learningStyle AS learning_style,
+           c.id AS course_id,
+           c.name AS course_name,
+           g.grade AS grade,
+           [(s)-[:INTERACTED_WITH]->(t:Textbook)<-[:ASSIGNED_TO_A_COURSE]-(c) | [t.id, t.name]] AS textbooks
+    """
+
+def get_course_cube_rows(neodriver, student_ids=None):
+    # One row per COMPLETED edge, with the course textbooks the student read; streamed, not buffered
+    yield from neodriver._driver.stream_query(CUBE_ROWS_QUERY,
+    student_ids=list(student_ids) if student_ids is not None else None,
+    query_name_="get_course_cube_rows",
+    database_=neodriver._db
+    )
+
+def _desc(value):
+    # ORDER BY ... DESC puts nulls first
+    return (value is None, value if value is not None else "")
+
+class CourseCube:
+    def __init__(self, version=None):
+        self.version = version
+        self.course_names = {}
+        self.textbook_names = {}
+        self.learners = defaultdict(lambda: defaultdict(int))  # course -> (grade, style) -> students
+        self.readers = defaultdict(lambda: defaultdict(int))   # course -> (textbook, grade) -> readers
+        self.totals = defaultdict(lambda: defaultdict(int))    # course -> grade -> students
+        self._students = {}  # student -> (style, {(course, grade): frozenset(textbooks)})
+        self._rows = {}      # (kind, course) -> served rows, dropped when the course changes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows, version=None):
+        cube = cls(version)
+        cube._apply(cube._group(rows), replace=False)
+        return cube
+
+    def _group(self, rows):
+        students = {}
+        for row in rows:
+            self.course_names[row["course_id"]] = row["course_name"]
+            style, facts = students.setdefault(row["student_id"], (row["learning_style"], {}))
+            books = facts.setdefault((row["course_id"], row["grade"]), set())
+            for textbook_id, textbook_name in row["textbooks"]:
+                self.textbook_names[textbook_id] = textbook_name
+                books.add(textbook_id)
+        return {sid: (style, {key: frozenset(books) for key, books in facts.items()})
+                for sid, (style, facts) in students.items()}
+
+    def _count(self, style, facts, sign: int):
+        for (course, grade), books in facts.items():
+            self.learners[course][(grade, style)] += sign
+            self.totals[course][grade] += sign
+            for textbook in books:
+                self.readers[course][(textbook, grade)] += sign
+            self._rows.pop(("learners", course), None)
+            self._rows.pop(("textbooks", course), None)
+
+    def _apply(self, students, replace: bool):
+        with self._lock:
+            for sid, (style, facts) in students.items():
+                if replace and sid in self._students:
+                    self._count(*self._students[sid], sign=-1)
+                self._count(style, facts, sign=+1)
+                self._students[sid] = (style, facts)
+
+    def update_students(self, student_ids, rows):
+        """Replace the contribution of each student in student_ids with rows (their current completions)."""
+        students = self._group(rows)
+        for sid in student_ids:
+            students.setdefault(sid, (None, {}))  # no completions left
+        self._apply(students, replace=True)
+        return sorted({course for _, facts in students.values() for course, _ in facts})
+
+    def learner_types(self, course_id: str):
+        with self._lock:
+            rows = self._rows.get(("learners", course_id))
+            if rows is None:
+                counts = [(key, n) for key, n in self.learners.get(course_id, {}).items() if n > 0]
+                rows = [{
+                    "c_id": course_id,
+                    "c_name": self.course_names.get(course_id),
+                    "grade": grade,
+                    "learning_style": style,
+                    "students": n,
+                } for (grade, style), n in sorted(counts, key=lambda kv: (_desc(kv[0][0]), _desc(kv[0][1])), reverse=True)]
+                self._rows[("learners", course_id)] = rows
+            return rows
+
+    def textbook_popularity(self, course_id: str):
+        with self._lock:
+            rows = self._rows.get(("textbooks", course_id))
+            if rows is None:
+                totals = self.totals.get(course_id, {})
+                counts = [(key, n) for key, n in self.readers.get(course_id, {}).items() if n > 0]
+                counts.sort(key=lambda kv: kv[1], reverse=True)
+                counts.sort(key=lambda kv: _desc(kv[0][1]), reverse=True)
+                rows = [{
+                    "textbook_id": textbook,
+                    "textbook_name": self.textbook_names.get(textbook),
+                    "grade": grade,
+                    "readers": n,
+                    "total_students": totals[grade],
+                    "proportion": n / totals[grade],
+                } for (textbook, grade), n in counts]
+                self._rows[("textbooks", course_id)] = rows
+            return rows
+
+_lock = threading.Lock()
+_cube: Optional[CourseCube] = None
+
+def get_course_cube(neodriver) -> CourseCube:
+    """Process-wide cube, (re)built in one pass when missing or when the graph data version moves."""
+    # Imported late: data_version depends on query_functions, which serves from this module
+    from data_version import current_data_version
+    global _cube
+    version = current_data_version(neodriver)
+    cube = _cube
+    if cube is not None and cube.version == version:
+        return cube
+    with _lock:
+        if _cube is None or _cube.version != version:
+            _cube = CourseCube.from_rows(get_course_cube_rows(neodriver), version=version)
+        return _cube
+
+async def get_course_cube_async() -> CourseCube:
+    """get_course_cube for async callers: only leaves the event loop to check a stale version or rebuild."""
+    from data_version import peek_data_version
+    from neo4j_driver import get_shared_driver
+    cube = _cube
+    if cube is not None and cube.version == peek_data_version():
+        return cube
+    return await run_in_threadpool(lambda: get_course_cube(get_shared_driver()))
+
+def apply_student_updates(neodriver, student_ids):
+    """
+    Fold new/changed COMPLETED edges of these students into the built cube. It keeps
+    the data version it was built at, so other changes committed meanwhile are still
+    picked up by a rebuild on the next version check. Returns the changed course IDs.
+    """
+    with _lock:
+        if _cube is None:
+            return []  # nothing built yet; the first request builds from scratch
+        return _cube.update_students(student_ids, get_course_cube_rows(neodriver, student_ids))
@@ -1,18 +1,166 @@
 import os
-from fastapi import FastAPI, HTTPException, Query
+import json
+import base64
+import hashlib
+import asyncio
+import logging
+import time
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from datetime import date
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from dotenv import load_dotenv
 
-from neo4j_driver import Neo4jDriver
+from neo4j_driver import (
+    GRAPH_BACKEND, AsyncNeo4jDriver, Neo4jDriver, get_shared_driver, close_shared_driver,
+    get_shared_async_driver, close_shared_async_driver,
+)
 from query_functions import *
+import async_query_functions as aqf
+import ML
 from ML import predict as ml_predict
+from artifacts import preload_artifacts
+from course_catalog import get_catalog
+from analytics_cube import apply_student_updates, get_course_cube
+from name_index import get_name_index, get_name_index_async
+from ml_pool import ml_pool
+from data_version import current_data_version, peek_data_version
+from fast_json import FastJSONResponse, dumps, projector
+from metrics import Counter, render_metrics
+from schema_migrations import apply_migrations, check_index_seeks
+from single_flight import single_flight
+from admission import AdmissionMiddleware
+import timing
+from timing import span
 from ai_summarizer import generate_summary
 from models import *
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+# How long startup waits for newly created indexes to come online (python -m schema_migrations waits 300s)
+SCHEMA_INDEX_WAIT_SECONDS = int(os.getenv("SCHEMA_INDEX_WAIT_SECONDS", "10"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve /ml/recommendations from prebuilt, memory-mapped models when available
+    # (pool workers load their own copy; the pages are shared through the mmap)
+    artifacts_dir = os.getenv("ML_ARTIFACTS_DIR")
+    if artifacts_dir and ml_pool.workers <= 0:
+        try:
+            preload_artifacts(artifacts_dir, get_shared_driver())
+        except ValueError as e:
+            logger.warning("Artifacts not preloaded: %s", e)
+
+    # One pooled driver for the whole process; warm the course catalog, name index and
+    # analytics with it. If Neo4j is not reachable yet they are all set up on first use.
+    try:
+        drv = get_shared_driver()
+        drv.check_liveness()
+        get_catalog(drv)
+        get_name_index(drv)
+        get_course_cube(drv)
+    except Exception as e:
+        logger.warning("Neo4j driver / course catalog / name index / analytics not preloaded: %s", e)
+    # Create the indexes the hot queries rely on, then confirm their plans seek on them. Off the
+    # event loop, and only briefly waiting for new indexes to come online: a long build reports
+    # them as not ONLINE here and finishes in the background
+    if GRAPH_BACKEND == "neo4j" and os.getenv("SCHEMA_MIGRATE_ON_STARTUP", "1") != "0":
+        try:
+            await run_in_threadpool(apply_migrations, get_shared_driver(), SCHEMA_INDEX_WAIT_SECONDS)
+            await run_in_threadpool(check_index_seeks, get_shared_driver())
+        except Exception as e:
+            logger.warning("Schema migration / index check: %s", e)
+    # Async driver for the async read endpoints; bound to this event loop
+    try:
+        get_shared_async_driver()
+    except ValueError as e:
+        logger.warning("Async Neo4j driver not created: %s", e)
+
+    # Spawning and warming the workers takes seconds: keep the event loop free meanwhile
+    await run_in_threadpool(ml_pool.start)
+    yield
+    ml_pool.shutdown()
+    ML.preloaded_models.clear()
+    await close_shared_async_driver()
+    close_shared_driver()
+
+app = FastAPI(title="Student Insight API", version="0.1.0", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Read endpoints answered with an ETag of (graph data version, path, normalized query)
+# and these Cache-Control values; a matching If-None-Match gets a 304 before any query runs
+CACHE_CONTROL = {
+    "/peers": "private, max-age=60",
+    "/student/alumni": "private, max-age=60",
+    "/course/learner-types": "public, max-age=300",
+    "/course/textbook-popularity": "public, max-age=300",
+    "/search": "public, max-age=300",
+}
+# Routes whose result also moves with the calendar (alumni are expectedGraduation < date()):
+# their ETag includes today's date, so the day rolling over invalidates it without a graph write
+DATE_DEPENDENT = {"/student/alumni"}
+HTTP_NOT_MODIFIED = Counter("http_not_modified_total", "Conditional GETs answered 304 from the data version", ("route",))
 
-app = FastAPI(title="Student Insight API", version="0.1.0")
+async def _data_version():
+    version = peek_data_version()
+    if version is None:
+        version = await run_in_threadpool(lambda: current_data_version(get_shared_driver()))
+    return version
+
+def _etag(version, request: Request) -> str:
+    params = sorted(request.query_params.multi_items())
+    key = [version, request.url.path, params]
+    if request.url.path in DATE_DEPENDENT:
+        key.append(date.today().isoformat())
+    digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+# Registered before CORS so CORS (outermost) also covers the 304s
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    cache_control = CACHE_CONTROL.get(request.url.path)
+    if cache_control is None or request.method != "GET":
+        return await call_next(request)
+    try:
+        version = await _data_version()
+    except Exception:
+        version = None  # graph unreachable: serve uncached and let the endpoint report it
+    if version is None:
+        return await call_next(request)
+    etag = _etag(version, request)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        HTTP_NOT_MODIFIED.inc(route=request.url.path)
+        return Response(status_code=304, headers=headers)
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+# Sheds /ml/* and /ai/summary with a fast 503 when their per-route limits are saturated
+# (see admission); inside server_timing so queue waits show up as a "queue" stage
+app.add_middleware(AdmissionMiddleware)
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Time the request's spans (see timing) into a Server-Timing header and /metrics."""
+    if not timing.SERVER_TIMING_ENABLED:
+        return await call_next(request)
+    spans = timing.start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Streamed bodies are still running here: their header covers the time to the first byte
+    response.headers["Server-Timing"] = timing.finish_request(
+        request.url.path, spans, (time.perf_counter() - started) * 1000)
+    return response
 
 ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -26,148 +174,391 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+ML_BATCH_CHUNK = int(os.getenv("ML_BATCH_CHUNK", "100"))
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "50"))
+
+def get_driver() -> Neo4jDriver:
+    """FastAPI dependency: the process-wide pooled driver (never closed per request)."""
+    try:
+        with span("connect"):
+            return get_shared_driver()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def get_async_driver() -> AsyncNeo4jDriver:
+    """FastAPI dependency: the process-wide async driver for the async endpoints."""
+    try:
+        with span("connect"):
+            return get_shared_async_driver()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def _resolve_course_id(by: str, course: str) -> str:
+    if by != "name":
+        return course
+    # The name index is in memory; only a data-version check / rebuild touches Neo4j
+    with span("resolve"):
+        course_id = (await get_name_index_async()).courses.id(course)
+    if not course_id:
+        raise HTTPException(status_code=404, detail=f"Course not found: {course}")
+    return course_id
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition: per-query Neo4j latency/rows/db-hit histograms and cache counters."""
+    return render_metrics()
+
+@app.get("/search")
+async def search_names(
+    q: str = Query(..., min_length=1, description="Name, name prefix or misspelled name"),
+    kind: str = Query("all", pattern="^(all|student|course)$"),
+    limit: int = Query(10, ge=1, le=100),
+    fuzzy: bool = Query(True, description="Fill up with trigram matches when exact/prefix matches run out"),
+):
+    """Autocomplete students and courses by name: exact, then prefix, then fuzzy matches."""
+    try:
+        index = await get_name_index_async()
+        results = []
+        for k in ("student", "course"):
+            if kind in ("all", k):
+                names = index.students if k == "student" else index.courses
+                results.extend({"kind": k, **hit} for hit in names.search(q, limit=limit, fuzzy=fuzzy))
+        if kind == "all":
+            order = {"exact": 0, "prefix": 1, "fuzzy": 2}
+            results.sort(key=lambda hit: (order[hit["match"]], -hit["score"]))
+        # shape: [{ kind, id, name, match, score }]
+        return FastJSONResponse(results[:limit])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 def _parse_grades(grades_csv: str) -> List[str]:
     if not grades_csv:
         return ["A", "A-", "B+"]
     return [g.strip() for g in grades_csv.split(",") if g.strip()]
 
+# Record -> response item by the Cypher's own aliases
+_peer_item = projector("id", "name", "grade", "similarity")
+_peer_item_with_textbooks = projector("id", "name", "grade", "similarity", "textbooks")
+_alumnus_item = projector("alumni.id")
+
+def _encode_cursor(key: dict) -> str:
+    """Opaque keyset cursor: the sort key of the last row served."""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _cursor_float(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(value)
+    return float(value)
+
+def _cursor_str(value) -> str:
+    if not isinstance(value, str):
+        raise TypeError(value)
+    return value
+
+def _cursor_date(value) -> str:
+    date.fromisoformat(_cursor_str(value))  # Cypher date() would fail on anything else
+    return value
+
+PEER_CURSOR = {"similarity": _cursor_float, "id": _cursor_str, "grade": _cursor_str}
+ALUMNI_CURSOR = {"graduation": _cursor_date, "id": _cursor_str}
+
+def _decode_cursor(cursor: Optional[str], fields) -> Optional[dict]:
+    """Cursor -> sort key, each field checked by its fields[name] validator; 400 for anything malformed."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(key, dict) and set(key) == set(fields):
+            return {name: check(key[name]) for name, check in fields.items()}
+    except (ValueError, TypeError):
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+def _ndjson(first_lines, records, to_item=dict, headers=None):
+    """NDJSON body: first_lines as-is, then one line per streamed record; a failure mid-stream ends with an error line."""
+    async def lines():
+        for line in first_lines:
+            yield dumps(line) + b"\n"
+        try:
+            async for record in records:
+                yield dumps(to_item(record)) + b"\n"
+        except Exception as e:
+            yield dumps({"error": str(e)}) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
 @app.get("/peers")
-def get_peers(
+async def get_peers(
     name: str = Query(...),
     by: str = Query("id", pattern="^(id|name)$"),
     course: str = Query(...),
     minSim: float = Query(0.8, ge=0.0, le=1.0),
     grades: str = Query("A,A-,B+"),
     withTextbooks: bool = Query(False),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson streams one peer per line"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the next page's cursor is in X-Next-Cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    drv: AsyncNeo4jDriver = Depends(get_async_driver),
 ):
-    drv = Neo4jDriver()
     try:
-        drv.connect()
-
         # 1) resolve to course_id if needed
-        if by == "name":
-            course_id = find_course_id_from_name(drv, course_name=course)
-            if not course_id:
-                raise HTTPException(status_code=404, detail=f"Course not found: {course}")
-        else:
-            course_id = course
+        course_id = await _resolve_course_id(by, course)
 
         grade_list = _parse_grades(grades)
+        to_item = _peer_item_with_textbooks if withTextbooks else _peer_item
 
         # 2) run the appropriate query
-        if withTextbooks:
-            recs = find_peers_with_textbooks(
-                drv, student_name=name, course_id=course_id,
-                min_similarity=minSim, grades=grade_list
-            )
-        else:
-            recs = find_successful_peers_id(
+        if limit or cursor:
+            # Keyset page: the query seeks past the cursor's (similarity, id, grade), no SKIP
+            after = _decode_cursor(cursor, PEER_CURSOR)
+            page_size = limit or PAGE_SIZE
+            find_page = aqf.find_peers_with_textbooks_page if withTextbooks else aqf.find_successful_peers_page
+            with span("query"):
+                recs = await find_page(drv, student_name=name, course_id=course_id, min_similarity=minSim,
+                                       grades=grade_list, limit=page_size, after=after)
+            with span("normalize"):
+                items = [to_item(r) for r in recs]
+            headers = {}
+            if len(recs) == page_size:
+                last = recs[-1]
+                headers["X-Next-Cursor"] = _encode_cursor(
+                    {"similarity": last["similarity"], "id": last["id"], "grade": last["grade"]})
+            if format == "ndjson":
+                return _ndjson([], _aiter(items), headers=headers)
+            return FastJSONResponse(items, headers=headers)
+        if format == "ndjson":
+            # Rows go out as Neo4j streams them (already ordered by similarity), never held in memory
+            iter_peers = aqf.iter_peers_with_textbooks if withTextbooks else aqf.iter_successful_peers_id
+            recs = iter_peers(drv, student_name=name, course_id=course_id, min_similarity=minSim, grades=grade_list)
+            return _ndjson([], recs, to_item)
+        find_peers = aqf.find_peers_with_textbooks if withTextbooks else aqf.find_successful_peers_id
+        with span("query"):
+            recs = await find_peers(
                 drv, student_name=name, course_id=course_id,
                 min_similarity=minSim, grades=grade_list
             )
 
-        # 3) normalize rows → dicts (your Cypher uses AS aliases already)
-        out = []
-        for r in recs:
-            row = r if isinstance(r, dict) else (getattr(r, "data", lambda: dict(r))())
-            item = {
-                "id": row.get("id") or row.get("peer.id"),
-                "name": row.get("name") or row.get("peer.name"),
-                "grade": row.get("grade") or row.get("peerGrade.grade"),
-                "similarity": float(row.get("similarity") or row.get("sim.similarity") or 0.0),
-            }
-            if withTextbooks:
-                item["textbooks"] = row.get("textbooks") or []
-            out.append(item)
-
-        out.sort(key=lambda x: x["similarity"], reverse=True)
-        return out
+        # 3) project rows → dicts; the Cypher already orders by similarity
+        with span("normalize"):
+            return FastJSONResponse([to_item(r) for r in recs])
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        drv.close()
 
 @app.get("/course/learner-types")
-def get_learner_types(
+async def get_learner_types(
     by: str = Query("id", pattern="^(id|name)$"),
     course: str = Query(..., description="Course ID (by=id) or Course Name (by=name)"),
+    drv: AsyncNeo4jDriver = Depends(get_async_driver),
 ):
-    drv = Neo4jDriver()
     try:
-        drv.connect()
-        course_id = course
-        if by == "name":
-            course_id = find_course_id_from_name(drv, course_name=course)
-            if not course_id:
-                raise HTTPException(status_code=404, detail=f"Course not found: {course}")
-
-        recs = learner_types_enrolled_in_a_course(drv, course_id=course_id)
-        # Normalize Neo4j records -> dicts
-        out = [dict(r) if isinstance(r, dict) else dict(r) for r in recs]
+        course_id = await _resolve_course_id(by, course)
+
+        recs = await aqf.learner_types_enrolled_in_a_course(drv, course_id=course_id)
         # shape: [{ c_id, c_name, grade, learning_style, students }]
-        return out
+        return FastJSONResponse(recs)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/course/textbook-popularity")
+async def get_textbook_popularity(
+    by: str = Query("id", pattern="^(id|name)$"),
+    course: str = Query(..., description="Course ID (by=id) or Course Name (by=name)"),
+    drv: AsyncNeo4jDriver = Depends(get_async_driver),
+):
+    """Share of the course's students per grade who read each of its textbooks (from the analytics cube)."""
+    try:
+        course_id = await _resolve_course_id(by, course)
+        # shape: [{ textbook_id, textbook_name, grade, readers, total_students, proportion }]
+        return FastJSONResponse(await aqf.textbooks_popularity_among_courses_groupped_by_grades(drv, course_id=course_id))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        drv.close()
 
 @app.get("/student/alumni")
-def get_alumni_from_same_degree(studentName: str = Query(...)):
-    drv = Neo4jDriver()
+async def get_alumni_from_same_degree(
+    studentName: str = Query(...),
+    format: str = Query("json", pattern="^(json|ndjson)$",
+                        description="ndjson streams a {student_id, degree_id, degree_name} line, then one line per alumnus"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the next page's cursor is in next_cursor / X-Next-Cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    drv: AsyncNeo4jDriver = Depends(get_async_driver),
+):
     try:
-        drv.connect()
-        student_id = find_student_id(drv, student_name=studentName)
+        with span("resolve"):
+            student_id = await aqf.find_student_id(drv, student_name=studentName)
         if not student_id:
             raise HTTPException(status_code=404, detail=f"Student not found: {studentName}")
 
-        deg = find_student_degree(drv, student_id=student_id)
-        if not deg or not deg.get("degree_id"):
+        degree_id = await aqf.find_student_degree(drv, student_id=student_id)
+        if not degree_id:
             raise HTTPException(status_code=404, detail="Degree for student is missing or lacks degree_id")
 
-        alumni = find_alumni_that_finished_from_same_degree(drv, degree_id=deg["degree_id"])
+        if limit or cursor:
+            # Keyset page on (expectedGraduation, id), the order the full listing uses
+            after = _decode_cursor(cursor, ALUMNI_CURSOR)
+            page_size = limit or PAGE_SIZE
+            with span("query"):
+                alumni, degree_name = await asyncio.gather(
+                    aqf.find_alumni_page(drv, degree_id=degree_id, limit=page_size, after=after),
+                    aqf.find_degree_name(drv, degree_id=degree_id),
+                )
+            next_cursor = None
+            if len(alumni) == page_size:
+                next_cursor = _encode_cursor({"graduation": alumni[-1]["graduation"].iso_format(), "id": alumni[-1]["alumni.id"]})
+            # Rows may be shared with coalesced callers: project, never pop the cursor field
+            alumni = [_alumnus_item(alumnus) for alumnus in alumni]
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+            header = {"student_id": student_id, "degree_id": degree_id, "degree_name": degree_name}
+            if format == "ndjson":
+                return _ndjson([header], _aiter(alumni), headers=headers)
+            return FastJSONResponse({**header, "alumni": alumni, "next_cursor": next_cursor}, headers=headers)
+
+        if format == "ndjson":
+            degree_name = await aqf.find_degree_name(drv, degree_id=degree_id)
+            header = {"student_id": student_id, "degree_id": degree_id, "degree_name": degree_name}
+            return _ndjson([header], aqf.iter_alumni_that_finished_from_same_degree(drv, degree_id=degree_id))
+
+        # Alumni list and degree name are independent; fetch them concurrently
+        with span("query"):
+            alumni, degree_name = await asyncio.gather(
+                aqf.find_alumni_that_finished_from_same_degree(drv, degree_id=degree_id),
+                aqf.find_degree_name(drv, degree_id=degree_id),
+            )
         # alumni is already a list of dicts per your function
-        return {
-            "student_id": student_id,
-            "degree_id": deg["degree_id"],
-            "degree_name": deg["degree_name"],
-            "alumni": alumni,
-        }
+        with span("normalize"):
+            return FastJSONResponse({
+                "student_id": student_id,
+                "degree_id": degree_id,
+                "degree_name": degree_name,
+                "alumni": alumni,
+            })
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        drv.close()
+
+def _recommendations_payload(name: str, courses, avg_score: float, sem_list):
+    recs = []
+    for i, cname in enumerate(courses):
+        recs.append({
+            "rank": i + 1,
+            "course_name": cname,
+            "suggested_term": sem_list[i] if i < len(sem_list) else None
+        })
+    return {
+        "student_name": name,
+        "avg_peer_score": avg_score,
+        "recommendations": recs
+    }
 
 @app.get("/ml/recommendations", tags=["ML"])
-def get_ml_recommendations(
+async def get_ml_recommendations(
     name: str = Query(..., description="Student name to base recommendations on"),
+    top_k: Optional[int] = Query(None, ge=1, description="Return only the k best-scoring courses"),
+    min_support: int = Query(1, ge=1, description="Minimum number of peers who took a course"),
 ):
     """Return ML-based course recommendations for a student.
 
-    Calls ML.predict(name) which returns (courses:list[str], avg_score:float, sem_list:list[str]).
+    Runs ML.predict(name, top_k, min_support) in the ML process pool; it returns
+    (courses:list[str], avg_score:float, sem_list:list[str]).
     """
     try:
-        courses, avg_score, sem_list = ml_predict(name)
-        recs = []
-        for i, cname in enumerate(courses):
-            recs.append({
-                "rank": i + 1,
-                "course_name": cname,
-                "suggested_term": sem_list[i] if i < len(sem_list) else None
-            })
-        return {
-            "student_name": name,
-            "avg_peer_score": avg_score,
-            "recommendations": recs
-        }
+        # Identical requests in flight share one pool call (ML.predict also coalesces inside a worker);
+        # the worker's spans come back with the result
+        with span("ml"):
+            (courses, avg_score, sem_list), spans = await single_flight.do_async(
+                ("ml_predict", name, top_k, min_support),
+                ml_pool.run, timing.collect, ml_predict, name, top_k=top_k, min_support=min_support
+            )
+        timing.merge(spans)
+        return _recommendations_payload(name, courses, avg_score, sem_list)
+    except HTTPException:
+        raise
+    except ML.StudentNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Recommendation timed out")
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail="ML worker restarted, retry later")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/ml/recommendations/batch", tags=["ML"])
+async def get_ml_recommendations_batch(body: BatchRecommendationRequest):
+    """Stream ML recommendations for many students as NDJSON, one line per student.
+
+    Students are grouped by degree so each peer model is built (or reused) once per
+    batch. Lines for students that could not be served carry an "error" field.
+    The batch runs in the ML process pool in chunks of ML_BATCH_CHUNK students.
+    """
+    async def lines():
+        for start in range(0, len(body.students), ML_BATCH_CHUNK):
+            chunk = body.students[start:start + ML_BATCH_CHUNK]
+            try:
+                results = await ml_pool.run(
+                    ML.predict_batch_list, chunk, by=body.by, top_k=body.top_k, min_support=body.min_support
+                )
+            except asyncio.TimeoutError:
+                results = [{"student": key, "error": "Recommendation timed out"} for key in chunk]
+            except BrokenProcessPool:
+                results = [{"student": key, "error": "ML worker restarted, retry later"} for key in chunk]
+            except Exception as e:
+                # The response is already streaming: report the failure on the chunk's lines instead
+                logger.exception("Batch recommendation chunk failed")
+                results = [{"student": key, "error": str(e)} for key in chunk]
+            for line in map(_batch_line, results):
+                yield line
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _batch_line(result) -> bytes:
+    if "error" in result:
+        line = result
+    else:
+        line = _recommendations_payload(
+            result["student_name"], result["courses"], result["avg_score"], result["sem_list"]
+        )
+        line["student"] = result["student"]
+        line["student_id"] = result["student_id"]
+    return dumps(line) + b"\n"
+
+@app.post("/ml/alumni/updates", tags=["ML"])
+async def post_ml_alumni_updates(body: AlumniUpdateRequest, drv: Neo4jDriver = Depends(get_driver)):
+    """Fold newly posted grades / graduations for these students into the built peer models
+    and the course analytics cube.
+
+    Meant to be called by the import job after it writes COMPLETED edges, so the
+    models and counts are patched in place of a full rebuild on the next request.
+    Every ML worker holds its own models, so the update is applied in each of them;
+    the cube lives in the API process. "courses" lists the courses whose counts changed.
+    """
+    try:
+        outcomes, courses = await asyncio.gather(
+            ml_pool.broadcast(ML.refresh_alumni, body.student_ids),
+            run_in_threadpool(apply_student_updates, drv, body.student_ids),
+        )
+        merged = {"updated": set(), "refit": set(), "skipped": set()}
+        for outcome in outcomes:
+            for key, degree_ids in outcome.items():
+                merged[key].update(degree_ids)
+        result = {key: sorted(degree_ids) for key, degree_ids in merged.items()}
+        result["courses"] = courses
+        return result
     except HTTPException:
         raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Model update timed out")
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail="ML worker restarted, retry later")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
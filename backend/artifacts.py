@@ -0,0 +1,168 @@
+"""
+Offline-trained peer-finder artifacts.
+
+Build (from backend/):
+    python -m artifacts --out ../artifacts
+
+Layout:
+    <out>/CURRENT                      name of the latest build directory
+    <out>/<build>/manifest.json        data version, build time, degree_id -> subdirectory
+    <out>/<build>/<degree dir>/
+        vocab.json                     categorical vocabularies (one-hot column order)
+        features.npy                   float32 alumni feature matrix
+        alumni_ids.npy                 alumni IDs, row-aligned with features
+        course_ids.npy, gpa.npy        course columns and per-alumnus GPA
+        history_{data,indices,indptr}.npy   CSR alumni x course history
+
+Every array is a plain .npy so the API can memory-map it (ML_ARTIFACTS_DIR) and
+several uvicorn workers share the same pages.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy import sparse
+
+from neo4j_driver import Neo4jDriver
+from query_functions import get_alumni_training_set, get_graph_data_version, list_degree_ids
+from course_matrix import CourseMatrix
+from data_version import current_data_version
+import ML
+from ML import PeerModel, fit_peer_model
+
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+
+logger = logging.getLogger(__name__)
+
+def save_peer_model(model: PeerModel, path: str):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "vocab.json"), "w") as f:
+        json.dump(model.vocab, f)
+    np.save(os.path.join(path, "features.npy"), np.ascontiguousarray(model.matrix, dtype=np.float32))
+    np.save(os.path.join(path, "alumni_ids.npy"), model.alumni_ids.astype(str))
+    np.save(os.path.join(path, "course_ids.npy"), model.courses.course_ids.astype(str))
+    np.save(os.path.join(path, "gpa.npy"), model.courses.gpa)
+    history = model.courses.history
+    np.save(os.path.join(path, "history_data.npy"), history.data)
+    np.save(os.path.join(path, "history_indices.npy"), history.indices)
+    np.save(os.path.join(path, "history_indptr.npy"), history.indptr)
+
+def load_peer_model(degree_id: str, path: str, mmap_mode: str = "r", as_of=None) -> PeerModel:
+    def load(name):
+        return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+    with open(os.path.join(path, "vocab.json")) as f:
+        vocab = json.load(f)
+    course_ids = load("course_ids.npy")
+    history = sparse.csr_matrix(
+        (load("history_data.npy"), load("history_indices.npy"), load("history_indptr.npy")),
+        shape=(len(load("gpa.npy")), len(course_ids)),
+        copy=False,
+    )
+    return PeerModel(
+        degree_id=degree_id,
+        vocab=vocab,
+        matrix=load("features.npy"),
+        alumni_ids=load("alumni_ids.npy"),
+        courses=CourseMatrix(course_ids.tolist(), history, load("gpa.npy")),
+        as_of=as_of,
+    )
+
+def resolve_build_dir(root: str) -> str:
+    """Accept either a build directory or the artifacts root holding a CURRENT pointer."""
+    if os.path.exists(os.path.join(root, MANIFEST)):
+        return root
+    with open(os.path.join(root, CURRENT)) as f:
+        return os.path.join(root, f.read().strip())
+
+def load_artifacts(root: str, data_version=None):
+    """
+    Memory-map every degree's model from the latest build. Returns (manifest, {degree_id: PeerModel}).
+    With data_version, a build made from any other version is stale and no models are loaded.
+    """
+    build_dir = resolve_build_dir(root)
+    with open(os.path.join(build_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    if data_version is not None and manifest["data_version"] != data_version:
+        return manifest, {}
+    # The training set holds alumni graduated before the build day; later ones come in as a delta
+    as_of = datetime.fromisoformat(manifest["built_at"]).date()
+    models = {
+        degree_id: load_peer_model(degree_id, os.path.join(build_dir, subdir), as_of=as_of)
+        for degree_id, subdir in manifest["degrees"].items()
+    }
+    return manifest, models
+
+def preload_artifacts(root: str, neo):
+    """Serve the latest build through ML.preloaded_models if it matches the graph's current data version."""
+    try:
+        version = current_data_version(neo)
+    except Exception as e:
+        logger.warning("Graph unreachable, artifacts not preloaded (models are fitted on demand): %s", e)
+        return None
+    manifest, models = load_artifacts(root, data_version=version)
+    if not models:
+        logger.warning("Artifacts in %s were built from data version %s, graph is at %s: ignoring them",
+                       root, manifest["data_version"], version)
+    ML.preloaded_models.update({degree_id: (version, model) for degree_id, model in models.items()})
+    return manifest
+
+def build_artifacts(neo, out_dir: str) -> str:
+    """Train every degree's peer finder and write a new versioned build under out_dir."""
+    version = get_graph_data_version(neo)
+    built_at = datetime.now(timezone.utc)
+    build_name = "v{}-{}".format(re.sub(r"[^A-Za-z0-9_.-]", "_", str(version)), built_at.strftime("%Y%m%dT%H%M%SZ"))
+    staging = os.path.join(out_dir, f".{build_name}.tmp")
+    os.makedirs(staging, exist_ok=True)
+
+    degrees = {}
+    try:
+        for i, degree_id in enumerate(list_degree_ids(neo)):
+            records = get_alumni_training_set(neo, degree_id)
+            if not records:
+                print(f"skip {degree_id}: no alumni")
+                continue
+            subdir = f"degree_{i:04d}"
+            save_peer_model(fit_peer_model(degree_id, records), os.path.join(staging, subdir))
+            degrees[degree_id] = subdir
+            print(f"built {degree_id}: {len(records)} alumni")
+
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump({
+                "data_version": version,
+                "built_at": built_at.isoformat(),
+                "degrees": degrees,
+            }, f, indent=2)
+        os.replace(staging, os.path.join(out_dir, build_name))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Swap the CURRENT pointer atomically so running loaders never see a half-written build
+    pointer = os.path.join(out_dir, f".{CURRENT}.tmp")
+    with open(pointer, "w") as f:
+        f.write(build_name)
+    os.replace(pointer, os.path.join(out_dir, CURRENT))
+    return os.path.join(out_dir, build_name)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train peer-finder artifacts for every degree.")
+    parser.add_argument("--out", default=os.getenv("ML_ARTIFACTS_DIR", "artifacts"), help="artifacts root directory")
+    args = parser.parse_args()
+
+    neo = Neo4jDriver()
+    neo.connect()
+    try:
+        path = build_artifacts(neo, args.out)
+    finally:
+        neo.close()
+    print(f"wrote {path}")
+
+if __name__ == "__main__":
+    main()
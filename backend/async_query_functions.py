@@ -0,0 +1,173 @@
+"""
+Async twins of query_functions for the async endpoints, run on AsyncNeo4jDriver.
+
+Cypher is shared with query_functions (same constants), so the two stay in step;
+the sync functions remain the API for scripts, ML and artifact builds.
+"""
+from analytics_cube import get_course_cube_async
+from name_index import get_name_index_async
+from query_cache import cached_query
+from single_flight import coalesced
+from query_functions import (
+    ID_TTL,
+    FIND_SUCCESSFUL_PEERS_QUERY,
+    FIND_PEERS_WITH_TEXTBOOKS_QUERY,
+    FIND_STUDENT_DEGREE_QUERY,
+    FIND_DEGREE_NAME_QUERY,
+    FIND_ALUMNI_QUERY,
+    FIND_SUCCESSFUL_PEERS_PAGE_QUERY,
+    FIND_PEERS_WITH_TEXTBOOKS_PAGE_QUERY,
+    FIND_ALUMNI_PAGE_QUERY,
+)
+
+@coalesced()
+async def find_successful_peers_id(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = (await get_name_index_async()).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = await neodriver._driver.execute_query(FIND_SUCCESSFUL_PEERS_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    query_name_="find_successful_peers_id",
+    database_=neodriver._db
+    )
+    return records
+
+async def iter_successful_peers_id(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = (await get_name_index_async()).students.ids(student_name)
+    if not student_ids:
+        return
+    # Streaming variant: records are yielded as the server sends them, best match first
+    async for record in neodriver._driver.stream_query(FIND_SUCCESSFUL_PEERS_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    query_name_="iter_successful_peers_id",
+    database_=neodriver._db
+    ):
+        yield record
+
+@coalesced()
+async def find_successful_peers_page(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+"), limit: int = 50, after=None):
+    student_ids = (await get_name_index_async()).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = await neodriver._driver.execute_query(FIND_SUCCESSFUL_PEERS_PAGE_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    limit=limit,
+    after=after,
+    query_name_="find_successful_peers_page",
+    database_=neodriver._db
+    )
+    return records
+
+async def find_course_id_from_name(neodriver, course_name: str):
+    return (await get_name_index_async()).courses.id(course_name)
+
+@coalesced()
+async def find_peers_with_textbooks(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = (await get_name_index_async()).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = await neodriver._driver.execute_query(FIND_PEERS_WITH_TEXTBOOKS_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    query_name_="find_peers_with_textbooks",
+    database_=neodriver._db
+    )
+    return records
+
+async def iter_peers_with_textbooks(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = (await get_name_index_async()).students.ids(student_name)
+    if not student_ids:
+        return
+    async for record in neodriver._driver.stream_query(FIND_PEERS_WITH_TEXTBOOKS_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    query_name_="iter_peers_with_textbooks",
+    database_=neodriver._db
+    ):
+        yield record
+
+@coalesced()
+async def find_peers_with_textbooks_page(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+"), limit: int = 50, after=None):
+    student_ids = (await get_name_index_async()).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = await neodriver._driver.execute_query(FIND_PEERS_WITH_TEXTBOOKS_PAGE_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    limit=limit,
+    after=after,
+    query_name_="find_peers_with_textbooks_page",
+    database_=neodriver._db
+    )
+    return records
+
+async def textbooks_popularity_among_courses_groupped_by_grades(neodriver, course_id: str):
+    return (await get_course_cube_async()).textbook_popularity(course_id)
+
+async def learner_types_enrolled_in_a_course(neodriver, course_id: str):
+    return (await get_course_cube_async()).learner_types(course_id)
+
+async def find_student_id(neodriver, student_name: str):
+    return (await get_name_index_async()).students.id(student_name)
+
+@cached_query(ttl=ID_TTL)
+@coalesced()
+async def find_student_degree(neodriver, student_id: str):
+    records, summary, keys = await neodriver._driver.execute_query(FIND_STUDENT_DEGREE_QUERY,
+    student_id=student_id,
+    query_name_="find_student_degree",
+    database_=neodriver._db
+    )
+    return records[0]["degree_id"] if records else None
+
+@coalesced()
+async def find_degree_name(neodriver, degree_id: str):
+    records, summary, keys = await neodriver._driver.execute_query(FIND_DEGREE_NAME_QUERY,
+    degree_id=degree_id,
+    query_name_="find_degree_name",
+    database_=neodriver._db
+    )
+    return records[0]["degree_name"] if records else None
+
+@coalesced()
+async def find_alumni_that_finished_from_same_degree(neodriver, degree_id: str):
+    records, summary, keys = await neodriver._driver.execute_query(FIND_ALUMNI_QUERY,
+    degree_id=degree_id,
+    query_name_="find_alumni_that_finished_from_same_degree",
+    database_=neodriver._db
+    )
+    return [dict(record) for record in records] if records else None
+
+async def iter_alumni_that_finished_from_same_degree(neodriver, degree_id: str):
+    async for record in neodriver._driver.stream_query(FIND_ALUMNI_QUERY,
+    degree_id=degree_id,
+    query_name_="iter_alumni_that_finished_from_same_degree",
+    database_=neodriver._db
+    ):
+        yield dict(record)
+
+@coalesced()
+async def find_alumni_page(neodriver, degree_id: str, limit: int = 50, after=None):
+    records, summary, keys = await neodriver._driver.execute_query(FIND_ALUMNI_PAGE_QUERY,
+    degree_id=degree_id,
+    limit=limit,
+    after=after,
+    query_name_="find_alumni_page",
+    database_=neodriver._db
+    )
+    return [dict(record) for record in records]
@@ -0,0 +1,116 @@
+"""
+Latency of a cheap endpoint while expensive ML and AI traffic runs against a live API.
+
+    uvicorn app:app --port 8000            # in another shell
+    python bench_api_load.py --student "Jane Doe" --course "CMSC 201"
+
+Measures /peers latency alone, then again while --ml-clients threads loop on
+/ml/recommendations (cycling through --ml-names, so single-flight cannot fold
+them into one call) and --ai-clients threads loop on POST /ai/summary, and
+prints p50/p99 for both phases plus how much expensive traffic was shed with
+503. Compare runs with ML_POOL_WORKERS=0 and >0, or with admission limits
+lifted (ADMISSION_ML_RECOMMENDATIONS=0 ADMISSION_AI_SUMMARY=0) on the server.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+def call(url: str, body: dict = None):
+    """(latency ms, HTTP status) of one GET, or POST when body is given; a 503 backs off for its Retry-After."""
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as r:
+            r.read()
+            status = r.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+        if status == 503 and e.headers.get("Retry-After"):
+            elapsed = (time.perf_counter() - start) * 1000
+            time.sleep(float(e.headers["Retry-After"]))
+            return elapsed, status
+    return (time.perf_counter() - start) * 1000, status
+
+def get(url: str) -> float:
+    return call(url)[0]
+
+def probe(url: str, n: int, clients: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(count):
+        for _ in range(count):
+            ms = get(url)
+            with lock:
+                latencies.append(ms)
+
+    threads = [threading.Thread(target=worker, args=(n // clients,)) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base", default="http://localhost:8000")
+    parser.add_argument("--student", required=True, help="student name used for both endpoints")
+    parser.add_argument("--course", required=True, help="course ID for /peers")
+    parser.add_argument("--requests", type=int, default=200, help="/peers requests per phase")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent /peers clients")
+    parser.add_argument("--ml-clients", type=int, default=16, help="concurrent /ml/recommendations clients")
+    parser.add_argument("--ml-names", default=None, help="comma-separated students the ML clients cycle through")
+    parser.add_argument("--ai-clients", type=int, default=0, help="concurrent POST /ai/summary clients")
+    args = parser.parse_args()
+
+    peers_url = f"{args.base}/peers?" + urllib.parse.urlencode({"name": args.student, "course": args.course})
+    names = itertools.cycle((args.ml_names or args.student).split(","))
+    expensive = {"/ml/recommendations": [], "/ai/summary": []}
+
+    get(peers_url)  # warm-up
+    idle = probe(peers_url, args.requests, args.clients)
+
+    stop = threading.Event()
+
+    def ml_client():
+        while not stop.is_set():
+            url = f"{args.base}/ml/recommendations?" + urllib.parse.urlencode({"name": next(names)})
+            expensive["/ml/recommendations"].append(call(url))
+
+    def ai_client():
+        while not stop.is_set():
+            expensive["/ai/summary"].append(call(f"{args.base}/ai/summary", {"student_name": next(names)}))
+
+    threads = [threading.Thread(target=ml_client, daemon=True) for _ in range(args.ml_clients)]
+    threads += [threading.Thread(target=ai_client, daemon=True) for _ in range(args.ai_clients)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)  # let the expensive load build up
+    loaded = probe(peers_url, args.requests, args.clients)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"{'phase':<24} {'n':>6} {'503 %':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    print(f"{'/peers idle':<24} {len(idle):>6} {'':>6} {np.percentile(idle, 50):>9.1f} {np.percentile(idle, 99):>9.1f}")
+    print(f"{'/peers under load':<24} {len(loaded):>6} {'':>6} {np.percentile(loaded, 50):>9.1f} {np.percentile(loaded, 99):>9.1f}")
+    for path, results in expensive.items():
+        if not results:
+            continue
+        shed = sum(status == 503 for _, status in results)
+        # Latency of the requests that were served; shed ones return in about a millisecond
+        served = np.array([ms for ms, status in results if status != 503] or [np.nan])
+        print(f"{path:<24} {len(results):>6} {100 * shed / len(results):>6.1f} "
+              f"{np.percentile(served, 50):>9.1f} {np.percentile(served, 99):>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Serialization time of 10k-row /peers and /student/alumni bodies: the previous
+path (per-row fallback dict, jsonable_encoder, JSONResponse) against the
+itemgetter projection and FastJSONResponse.
+
+    python bench_json.py --rows 10000 --repeat 20
+
+Rows are real neo4j.Record objects with the aliases the Cypher returns; alumni
+rows carry their expectedGraduation as a neo4j.time.Date.
+"""
+import argparse
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from neo4j import Record
+from neo4j.time import Date
+
+from fast_json import FastJSONResponse, projector
+
+GRADES = ["A", "A-", "B+"]
+
+def peer_records(n: int, rng):
+    return [Record({
+        "id": f"S{i:07d}",
+        "name": f"Student {i}",
+        "grade": GRADES[i % 3],
+        "similarity": float(rng.random()),
+        "textbooks": [f"Textbook {j}" for j in range(i % 4)],
+    }) for i in range(n)]
+
+def alumni_records(n: int):
+    return [Record({"alumni.id": f"S{i:07d}", "graduation": Date(2020 + i % 5, 1 + i % 12, 1 + i % 28)}) for i in range(n)]
+
+def legacy_peer_item(r) -> dict:
+    # The pre-projection /peers normalization
+    row = r if isinstance(r, dict) else (getattr(r, "data", lambda: dict(r))())
+    return {
+        "id": row.get("id") or row.get("peer.id"),
+        "name": row.get("name") or row.get("peer.name"),
+        "grade": row.get("grade") or row.get("peerGrade.grade"),
+        "similarity": float(row.get("similarity") or row.get("sim.similarity") or 0.0),
+        "textbooks": row.get("textbooks") or [],
+    }
+
+def timed(fn, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    peers = peer_records(args.rows, np.random.default_rng(args.seed))
+    alumni = [dict(r) for r in alumni_records(args.rows)]  # as find_alumni_* return them
+    peer_item = projector("id", "name", "grade", "similarity", "textbooks")
+    cases = {
+        "peers   default": lambda: JSONResponse(jsonable_encoder([legacy_peer_item(r) for r in peers])).body,
+        "peers   fast": lambda: FastJSONResponse([peer_item(r) for r in peers]).body,
+        # jsonable_encoder turns Date into its private fields, so the default path needs .iso_format() per row
+        "alumni  default": lambda: JSONResponse(jsonable_encoder(
+            [{"alumni.id": r["alumni.id"], "graduation": r["graduation"].iso_format()} for r in alumni])).body,
+        "alumni  fast": lambda: FastJSONResponse(alumni).body,
+    }
+    print(f"{'payload':<16} {'rows':>7} {'bytes':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, fn in cases.items():
+        ms, size = timed(fn, args.repeat)
+        print(f"{label:<16} {args.rows:>7} {size:>9} {np.percentile(ms, 50):>8.2f} {np.percentile(ms, 99):>8.2f}")
+
+if __name__ == "__main__":
+    main()
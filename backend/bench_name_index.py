@@ -0,0 +1,68 @@
+"""
+Build time and per-lookup latency of name_index.NameIndex on synthetic student names.
+
+    python bench_name_index.py --sizes 10000 100000 1000000
+
+Names are "First Last" drawn from small vocabularies, so many are shared, as in
+the synthetic dataset. Prefix queries are the first 3-6 characters of a name and
+fuzzy queries are names with one adjacent-letter swap (exact and prefix miss).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from name_index import NameIndex
+
+FIRST = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+         "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Gregory", "Karen"]
+SYLLABLES = ["bar", "tel", "son", "mit", "ch", "ell", "wil", "li", "ams", "and", "er", "ston", "ford", "ley", "man"]
+
+def synthetic_names(n: int, rng):
+    # ~3k distinct surnames from 2-3 syllables, so duplicates are common
+    surnames = sorted({"".join(rng.choice(SYLLABLES, size=rng.integers(2, 4))).capitalize() for _ in range(5000)})
+    first = rng.choice(FIRST, size=n)
+    last = rng.choice(surnames, size=n)
+    return [f"{a} {b}" for a, b in zip(first, last)]
+
+def typo(name: str, rng) -> str:
+    i = int(rng.integers(1, len(name) - 2))
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def timed(fn, queries):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'names':>9} {'build s':>8} {'lookup':<8} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in args.sizes:
+        names = synthetic_names(n, rng)
+        start = time.perf_counter()
+        index = NameIndex([f"S{i:07d}" for i in range(n)], names)
+        build = time.perf_counter() - start
+
+        sample = [names[i] for i in rng.integers(0, n, size=args.queries)]
+        lookups = {
+            "exact": (index.ids, sample),
+            "prefix": (lambda q: index.search(q, limit=args.limit, fuzzy=False),
+                       [name[:int(rng.integers(3, 7))] for name in sample]),
+            "fuzzy": (lambda q: index.search(q, limit=args.limit), [typo(name, rng) for name in sample]),
+        }
+        for label, (fn, queries) in lookups.items():
+            ms = timed(fn, queries)
+            print(f"{n:>9} {build:>8.2f} {label:<8} {np.percentile(ms, 50):>8.3f} {np.percentile(ms, 99):>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Per-request cost of a fresh Neo4jDriver versus the shared pooled one.
+
+    python bench_neo4j_driver.py --iterations 50
+
+"fresh" repeats what every endpoint used to do (Neo4jDriver() -> connect() ->
+query -> close()), paying routing-table fetch, TLS and auth each time;
+"shared" runs the same query on get_shared_driver(). Uses the .env credentials.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from neo4j_driver import Neo4jDriver, get_shared_driver, close_shared_driver
+from query_functions import get_graph_data_version
+
+def fresh_request():
+    drv = Neo4jDriver()
+    drv.connect()
+    try:
+        get_graph_data_version(drv)
+    finally:
+        drv.close()
+
+def shared_request():
+    get_graph_data_version(get_shared_driver())
+
+def measure(fn, iterations: int) -> np.ndarray:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    shared_request()  # open the pool before timing
+    print(f"{'mode':<8} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for name, fn in (("fresh", fresh_request), ("shared", shared_request)):
+        ms = measure(fn, args.iterations)
+        print(f"{name:<8} {np.percentile(ms, 50):>9.2f} {np.percentile(ms, 99):>9.2f} {ms.mean():>9.2f}")
+    close_shared_driver()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Recall@10 and per-query latency of the peer_index backends on synthetic alumni.
+
+    python bench_peer_index.py --sizes 10000 100000 1000000 --probes 1 4 8 16
+
+Feature rows are drawn from the same categorical/numeric distributions as the
+synthetic dataset and encoded with ML.encode_features. Because many alumni share
+identical feature vectors, recall counts a returned peer as correct when its
+cosine distance is within the exact 10th-nearest distance (ties are equivalent).
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ML import categorical, numeric, encode_features, fit_vocab
+from peer_index import ExactIndex, IVFIndex
+
+CATEGORIES = {
+    "s.learningStyle": (["Visual", "Auditory", "Kinesthetic", "Reading/Writing"], [0.4, 0.2, 0.2, 0.2]),
+    "s.preferredPace": (["Accelerated", "Standard", "Part-time"], [0.1, 0.7, 0.2]),
+    "s.financialAidStatus": (["Scholarship", "FinancialAid", "Self-Pay", "Loans"], [0.15, 0.35, 0.35, 0.15]),
+    "s.preferredInstructionMode": (["In-person", "Online", "Hybrid"], [0.6, 0.2, 0.2]),
+}
+
+def synthetic_features(n: int, rng) -> pd.DataFrame:
+    data = {column: rng.choice(values, size=n, p=weights) for column, (values, weights) in CATEGORIES.items()}
+    data["s.preferredCourseLoad"] = rng.integers(2, 6, size=n)
+    data["s.workHoursPerWeek"] = rng.integers(0, 41, size=n)
+    return pd.DataFrame(data)[categorical + numeric]
+
+def timed_queries(index, queries, k: int):
+    latencies = []
+    distances, indices = [], []
+    for q in queries:
+        start = time.perf_counter()
+        d, i = index.kneighbors(q[None, :], n_neighbors=k)
+        latencies.append(time.perf_counter() - start)
+        distances.append(d[0])
+        indices.append(i[0])
+    return np.array(distances), np.array(indices), np.array(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'alumni':>9} {'backend':<14} {'build s':>8} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in args.sizes:
+        df = synthetic_features(n, rng)
+        vocab = fit_vocab(df)
+        X = encode_features(df, vocab)
+        Q = encode_features(synthetic_features(args.queries, rng), vocab)
+
+        start = time.perf_counter()
+        exact = ExactIndex(n_neighbors=args.k).fit(X)
+        build = time.perf_counter() - start
+        exact_d, _, lat = timed_queries(exact, Q, args.k)
+        print(f"{n:>9} {'exact':<14} {build:>8.2f} {1.0:>9.3f} {np.percentile(lat, 50):>8.3f} {np.percentile(lat, 99):>8.3f}")
+
+        for n_probe in args.probes:
+            start = time.perf_counter()
+            ivf = IVFIndex(n_neighbors=args.k, n_probe=n_probe).fit(X)
+            build = time.perf_counter() - start
+            d, _, lat = timed_queries(ivf, Q, args.k)
+            recall = float(np.mean(d <= exact_d[:, -1:] + 1e-6))
+            print(f"{n:>9} {f'ivf probe={n_probe}':<14} {build:>8.2f} {recall:>9.3f} {np.percentile(lat, 50):>8.3f} {np.percentile(lat, 99):>8.3f}")
+
+if __name__ == "__main__":
+    main()
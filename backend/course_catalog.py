@@ -0,0 +1,88 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from data_version import current_data_version
+from query_functions import get_course_catalog
+
+class CourseCatalog:
+    """
+    Every course held in memory: id <-> name maps plus compact attribute arrays.
+
+    credits/level are small-int arrays (-1 when missing) and termAvailability /
+    instructionModes are bitmasks over their value vocabularies, all indexed by
+    the course's position in ids.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.ids = np.asarray([row["id"] for row in rows], dtype=object)
+        self.names = np.asarray([row["name"] for row in rows], dtype=object)
+        self.position = {course_id: i for i, course_id in enumerate(self.ids)}
+        self.id_by_name = {}
+        for row in rows:
+            # Names are not unique; keep the first like find_course_id_from_name's LIMIT 1
+            self.id_by_name.setdefault(row["name"], row["id"])
+        self.credits = np.asarray([row["credits"] if row["credits"] is not None else -1 for row in rows], dtype=np.int16)
+        self.level = np.asarray([row["level"] if row["level"] is not None else -1 for row in rows], dtype=np.int16)
+        self.term_vocab, self.terms = self._bitmasks(rows, "termAvailability")
+        self.mode_vocab, self.modes = self._bitmasks(rows, "instructionModes")
+
+    @staticmethod
+    def _bitmasks(rows, field):
+        vocab = sorted({value for row in rows for value in (row[field] or [])})
+        bit = {value: 1 << i for i, value in enumerate(vocab)}
+        masks = np.asarray([sum(bit[value] for value in set(row[field] or [])) for row in rows], dtype=np.int64)
+        return vocab, masks
+
+    @staticmethod
+    def _decode(mask: int, vocab) -> List[str]:
+        return [value for i, value in enumerate(vocab) if mask >> i & 1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def course_id_from_name(self, name: str) -> Optional[str]:
+        return self.id_by_name.get(name)
+
+    def name(self, course_id: str) -> Optional[str]:
+        i = self.position.get(course_id)
+        return self.names[i] if i is not None else None
+
+    def names_for(self, course_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {course_id: self.name(course_id) for course_id in course_ids}
+
+    def ids_for(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {name: self.id_by_name.get(name) for name in names}
+
+    def attributes(self, course_id: str) -> Optional[dict]:
+        i = self.position.get(course_id)
+        if i is None:
+            return None
+        return {
+            "id": course_id,
+            "name": self.names[i],
+            "credits": int(self.credits[i]) if self.credits[i] >= 0 else None,
+            "level": int(self.level[i]) if self.level[i] >= 0 else None,
+            "termAvailability": self._decode(int(self.terms[i]), self.term_vocab),
+            "instructionModes": self._decode(int(self.modes[i]), self.mode_vocab),
+        }
+
+    def attributes_for(self, course_ids: Iterable[str]) -> Dict[str, Optional[dict]]:
+        return {course_id: self.attributes(course_id) for course_id in course_ids}
+
+_lock = threading.Lock()
+_catalog: Optional[CourseCatalog] = None
+
+def get_catalog(neodriver) -> CourseCatalog:
+    """Process-wide catalog, (re)loaded from Neo4j when missing or when the graph data version moves."""
+    global _catalog
+    version = current_data_version(neodriver)
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = CourseCatalog(get_course_catalog(neodriver), version=version)
+        return _catalog
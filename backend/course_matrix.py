@@ -0,0 +1,105 @@
+import numpy as np
+from scipy import sparse
+
+class CourseMatrix:
+    """
+    Alumni x course history as a CSR matrix plus a row-aligned GPA vector.
+
+    Course IDs are mapped to integer columns once at build time, so scoring a
+    peer set is a single sparse reduction with no string handling per request.
+    A course taken more than once by the same alumnus counts once per attempt.
+    """
+
+    def __init__(self, course_ids, history: sparse.csr_matrix, gpa: np.ndarray):
+        self.course_ids = np.asarray(course_ids, dtype=object)
+        self.course_index = {course_id: i for i, course_id in enumerate(self.course_ids)}
+        self.history = history
+        self.gpa = gpa
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from training-set records ({"path": [{"course_id", ...}], "GPA", ...})."""
+        course_index = {}
+        indptr = [0]
+        indices = []
+        gpa = []
+        for record in records:
+            for course in record["path"]:
+                indices.append(course_index.setdefault(course["course_id"], len(course_index)))
+            indptr.append(len(indices))
+            gpa.append(record["GPA"])
+
+        history = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(course_index)),
+        )
+        history.sum_duplicates()
+        return cls(list(course_index), history, np.asarray(gpa, dtype=np.float64))
+
+    def with_updates(self, records, rows) -> "CourseMatrix":
+        """
+        Copy of this matrix with each record's history/GPA written to its row in
+        rows (an existing row index, or -1 to append). New course IDs extend the
+        column vocabulary; untouched rows are carried over without re-encoding.
+        """
+        course_ids = list(self.course_ids)
+        course_index = dict(self.course_index)
+        for record in records:
+            for course in record["path"]:
+                if course["course_id"] not in course_index:
+                    course_index[course["course_id"]] = len(course_ids)
+                    course_ids.append(course["course_id"])
+        delta = CourseMatrix.from_records(records)
+        remap = np.asarray([course_index[c] for c in delta.course_ids], dtype=np.int32)
+        delta_history = sparse.csr_matrix(
+            (delta.history.data, remap[delta.history.indices], delta.history.indptr),
+            shape=(len(records), len(course_ids)),
+        )
+
+        rows = np.asarray(rows, dtype=np.int64)
+        replaced = np.flatnonzero(rows >= 0)
+        n_old = self.history.shape[0]
+        base = sparse.csr_matrix(
+            (self.history.data, self.history.indices, self.history.indptr),
+            shape=(n_old, len(course_ids)),
+        )
+        keep = np.ones(n_old, dtype=np.float32)
+        keep[rows[replaced]] = 0
+        kept = (sparse.diags(keep) @ base).tocsr()
+        kept.eliminate_zeros()
+        # Scatter the replacement rows back to their original positions
+        placement = sparse.csr_matrix(
+            (np.ones(len(replaced), dtype=np.float32), (rows[replaced], np.arange(len(replaced)))),
+            shape=(n_old, len(replaced)),
+        )
+        history = sparse.vstack([
+            kept + placement @ delta_history[replaced],
+            delta_history[np.flatnonzero(rows < 0)],
+        ]).tocsr()
+
+        gpa = np.array(self.gpa, dtype=np.float64)
+        gpa[rows[replaced]] = delta.gpa[replaced]
+        gpa = np.concatenate([gpa, delta.gpa[rows < 0]])
+        return CourseMatrix(course_ids, history, gpa)
+
+    def nbytes(self) -> int:
+        return int(
+            self.history.data.nbytes + self.history.indices.nbytes + self.history.indptr.nbytes
+            + self.gpa.nbytes + self.course_ids.nbytes
+        )
+
+    def peer_scores(self, rows):
+        """Mean peer GPA per course over the given alumni rows, and how many of those peers took it."""
+        rows = np.asarray(rows)
+        sub = self.history[rows]
+        attempts = np.asarray(sub.sum(axis=0)).ravel()
+        totals = sub.T @ self.gpa[rows]
+        scores = np.divide(totals, attempts, out=np.full(len(self.course_ids), np.nan), where=attempts > 0)
+        return scores, sub.getnnz(axis=0)
+
+    def columns(self, course_ids) -> np.ndarray:
+        """Column indices of the given course IDs; IDs outside the vocabulary are skipped."""
+        return np.fromiter(
+            (self.course_index[c] for c in course_ids if c in self.course_index),
+            dtype=np.int64,
+        )
@@ -0,0 +1,31 @@
+import os
+import threading
+import time
+
+from query_functions import get_graph_data_version
+
+# How long a fetched version stamp is trusted before asking the graph again
+CHECK_INTERVAL = float(os.getenv("DATA_VERSION_CHECK_SECONDS", "30"))
+
+_lock = threading.Lock()
+_state = {"version": None, "checked_at": 0.0}
+
+def current_data_version(neodriver, force: bool = False):
+    """Return the graph data version, re-reading it at most every CHECK_INTERVAL seconds."""
+    now = time.monotonic()
+    with _lock:
+        if not force and _state["version"] is not None and now - _state["checked_at"] < CHECK_INTERVAL:
+            return _state["version"]
+
+    version = get_graph_data_version(neodriver)
+    with _lock:
+        _state["version"] = version
+        _state["checked_at"] = now
+    return version
+
+def peek_data_version():
+    """The last fetched version if it is still within CHECK_INTERVAL, else None (never queries)."""
+    with _lock:
+        if _state["version"] is not None and time.monotonic() - _state["checked_at"] < CHECK_INTERVAL:
+            return _state["version"]
+    return None
@@ -0,0 +1,43 @@
+"""
+One JSON serializer for every API response: orjson, taught Neo4j's temporal types.
+
+FastJSONResponse bodies are serialized straight from the returned rows; endpoints
+return it directly so FastAPI's jsonable_encoder never walks the payload (it
+also mangles neo4j.time values into their private attributes).
+"""
+from operator import itemgetter
+
+import orjson
+from fastapi.responses import JSONResponse
+from neo4j.time import Date, DateTime, Duration, Time
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj):
+    # Called only for types orjson does not know natively
+    if isinstance(obj, (Date, DateTime, Time, Duration)):
+        return obj.iso_format()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+def projector(*fields):
+    """
+    record -> dict of fields. fields must be the leading RETURN columns, in order:
+    a neo4j.Record is a tuple of its values, zipped as-is (Record.__getitem__ by key
+    is pure Python and dominates large payloads); dict rows go through one itemgetter.
+    """
+    get = itemgetter(*fields)
+
+    def project(record):
+        if isinstance(record, tuple):
+            return dict(zip(fields, record))
+        return {fields[0]: get(record)} if len(fields) == 1 else dict(zip(fields, get(record)))
+    return project
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,492 @@
+"""
+Read-only in-memory graph built from the CSVs that Data/generate_synthetic_dataset.py
+exports (export_to_csv), for serving or CI without Neo4j:
+
+    GRAPH_BACKEND=memory GRAPH_CSV_DIR=Data/umbc_data/csv uvicorn app:app
+
+Nodes are integer-indexed per label with their properties in NumPy arrays;
+relationships are CSR adjacency (indptr/indices plus row-aligned property arrays),
+mirroring what cypher/data_import.cypher and cypher/relations.cypher build.
+
+MemoryDriver stands in for the neo4j driver behind Neo4jDriver, so every function
+in query_functions / async_query_functions runs unchanged: the Cypher each one sends
+is answered by the handler registered under that query function's name.
+"""
+import os
+import threading
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from neo4j import EagerResult
+from neo4j.time import Date
+
+GRAPH_CSV_DIR = os.getenv("GRAPH_CSV_DIR", "umbc_data/csv")
+
+GRADE_POINTS = {"A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
+                "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0}
+FEATURE_KEYS = ["learningStyle", "preferredCourseLoad", "preferredPace", "workHoursPerWeek",
+                "financialAidStatus", "preferredInstructionMode"]
+
+class MemoryRecord(dict):
+    """dict with the parts of neo4j.Record the query functions use (r["k"], r[0], r.data())."""
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self.values())[key]
+        return dict.__getitem__(self, key)
+
+    def data(self):
+        return dict(self)
+
+class _Nodes:
+    def __init__(self, ids, **props):
+        self.ids = np.asarray(ids, dtype=object)
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.props = props
+
+    def __len__(self):
+        return len(self.ids)
+
+class _Adjacency:
+    """CSR relationship: node i's edges are indices[indptr[i]:indptr[i + 1]], props row-aligned."""
+
+    def __init__(self, src, dst, n_src: int, **props):
+        order = np.argsort(src, kind="stable")
+        self.indptr = np.zeros(n_src + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n_src), out=self.indptr[1:])
+        self.indices = np.asarray(dst, dtype=np.int32)[order]
+        self.props = {name: np.asarray(values)[order] for name, values in props.items()}
+
+    def __len__(self):
+        return len(self.indices)
+
+    def row(self, i: int) -> slice:
+        return slice(self.indptr[i], self.indptr[i + 1])
+
+    def targets(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+def _read(csv_dir: str, name: str) -> pd.DataFrame:
+    return pd.read_csv(os.path.join(csv_dir, name), dtype=str, keep_default_na=False)
+
+def _list(value: str):
+    # neo4j-admin import in the generator uses ';' as the array delimiter
+    return [v for v in value.split(";") if v] if value else []
+
+def _int(values):
+    return [int(float(v)) if v != "" else None for v in values]
+
+def _float(values):
+    return np.asarray([float(v) if v != "" else np.nan for v in values], dtype=np.float64)
+
+def _edges(df, src_col, dst_col, src_nodes: _Nodes, dst_nodes: _Nodes):
+    """Map id columns to node indices, dropping edges whose endpoints do not exist (as MATCH would)."""
+    src = np.asarray([src_nodes.index.get(v.strip(), -1) for v in df[src_col]], dtype=np.int64)
+    dst = np.asarray([dst_nodes.index.get(v.strip(), -1) for v in df[dst_col]], dtype=np.int64)
+    keep = (src >= 0) & (dst >= 0)
+    return src[keep], dst[keep], keep
+
+class MemoryGraph:
+    def __init__(self, csv_dir: str):
+        self.csv_dir = csv_dir
+        files = [os.path.join(csv_dir, f) for f in os.listdir(csv_dir) if f.endswith(".csv")]
+        self.version = f"csv:{int(max(os.path.getmtime(f) for f in files))}"
+
+        df = _read(csv_dir, "students.csv")
+        self.students = _Nodes(
+            df["id:ID(Student)"],
+            name=np.asarray(df["name"], dtype=object),
+            expectedGraduation=pd.to_datetime(df["expectedGraduation"], errors="coerce").values.astype("datetime64[D]"),
+            learningStyle=np.asarray(df["learningStyle"], dtype=object),
+            preferredCourseLoad=_int(df["preferredCourseLoad:int"]),
+            preferredPace=np.asarray(df["preferredPace"], dtype=object),
+            workHoursPerWeek=_int(df["workHoursPerWeek:int"]),
+            financialAidStatus=np.asarray(df["financialAidStatus"], dtype=object),
+            preferredInstructionMode=np.asarray(df["preferredInstructionMode"], dtype=object),
+        )
+        df = _read(csv_dir, "courses.csv")
+        self.courses = _Nodes(
+            df["id:ID(Course)"],
+            name=np.asarray(df["name"], dtype=object),
+            credits=_int(df["credits:int"]),
+            level=_int(df["level:int"]),
+            termAvailability=[_list(v) for v in df["termAvailability"]],
+            instructionModes=[_list(v) for v in df["instructionModes"]],
+        )
+        df = _read(csv_dir, "degrees.csv")
+        self.degrees = _Nodes(df["id:ID(Degree)"], name=np.asarray(df["name"], dtype=object))
+        df = _read(csv_dir, "textbooks.csv")
+        self.textbooks = _Nodes(df["id:ID(Textbook)"], name=np.asarray(df["name"], dtype=object))
+
+        n_students, n_courses = len(self.students), len(self.courses)
+
+        # (Student)-[:COMPLETED {grade, term}]->(Course), both directions
+        df = _read(csv_dir, "completed_courses.csv")
+        s, c, keep = _edges(df, ":START_ID(Student)", ":END_ID(Course)", self.students, self.courses)
+        grade = np.asarray(df["grade"], dtype=object)[keep]
+        term = np.asarray(df["term"], dtype=object)[keep]
+        self.completed = _Adjacency(s, c, n_students, grade=grade, term=term)
+        self.completed_by = _Adjacency(c, s, n_courses, grade=grade, term=term)
+
+        # (Student)-[:SIMILAR_LEARNING_STYLE {similarity}]->(Student)
+        df = _read(csv_dir, "learning_style_similarity.csv")
+        a, b, keep = _edges(df, ":START_ID(Student)", ":END_ID(Student)", self.students, self.students)
+        self.similar = _Adjacency(a, b, n_students, similarity=_float(df["similarity:float"])[keep])
+
+        # (Student)-[:DEGREE]->(Degree); MERGE in relations.cypher, so duplicates collapse
+        df = _read(csv_dir, "student_degree.csv").drop_duplicates([":START_ID(Student)", ":END_ID(Degree)"])
+        s, d, keep = _edges(df, ":START_ID(Student)", ":END_ID(Degree)", self.students, self.degrees)
+        self.degree_of = _Adjacency(s, d, n_students)
+        self.degree_students = _Adjacency(d, s, len(self.degrees))
+
+        # (Student)-[:INTERACTED_WITH]->(Textbook) and (Course)-[:ASSIGNED_TO_A_COURSE]->(Textbook)
+        df = _read(csv_dir, "textbook_interactions.csv")
+        s, t, keep = _edges(df, ":START_ID(Student)", ":END_ID(Textbook)", self.students, self.textbooks)
+        self.interacted = _Adjacency(s, t, n_students)
+        df = _read(csv_dir, "course_textbooks.csv")
+        c, t, keep = _edges(df, ":START_ID(Course)", ":END_ID(Textbook)", self.courses, self.textbooks)
+        self.assigned = _Adjacency(c, t, n_courses)
+
+    def run(self, name: str, query: str, params: dict):
+        handler = HANDLERS.get(name)
+        if handler is None:
+            raise NotImplementedError(f"{name} is not supported by the in-memory graph backend")
+        return handler(self, query, params)
+
+    # Helpers shared by the handlers
+
+    def graduation(self, i: int):
+        value = self.students.props["expectedGraduation"][i]
+        return None if np.isnat(value) else Date.from_native(value.astype(object))
+
+    def features(self, i: int) -> dict:
+        return {f"s.{key}": self.students.props[key][i] for key in FEATURE_KEYS}
+
+    def course_takers(self, c: int):
+        """student index -> grades on course c (one entry per COMPLETED edge)."""
+        rows = self.completed_by.row(c)
+        takers = defaultdict(list)
+        for s, grade in zip(self.completed_by.indices[rows].tolist(), self.completed_by.props["grade"][rows]):
+            takers[s].append(grade)
+        return takers
+
+    def degree_alumni(self, degree_id: str):
+        """Graduated students with a DEGREE edge to degree_id, ordered by expectedGraduation."""
+        d = self.degrees.index.get(degree_id)
+        if d is None:
+            return []
+        students = self.degree_students.targets(d)
+        grad = self.students.props["expectedGraduation"][students]
+        graduated = grad < np.datetime64(date.today())  # NaT compares False, like a null date
+        order = np.argsort(grad[graduated], kind="stable")
+        return students[graduated][order].tolist()
+
+HANDLERS = {}
+
+def handles(*names):
+    def register(fn):
+        for name in names:
+            HANDLERS[name] = fn
+        return fn
+    return register
+
+def _peer_rows(g: MemoryGraph, p: dict):
+    """(peer, grade, similarity) per matching path of FIND_SUCCESSFUL_PEERS_QUERY, best first."""
+    c = g.courses.index.get(p["course_id"])
+    if c is None:
+        return []
+    takers = g.course_takers(c)
+    grades = set(p["grades"])
+    rows = []
+    for you in (g.students.index[sid] for sid in p["student_ids"] if sid in g.students.index):
+        for _ in takers.get(you, ()):  # one row per (you)-[:COMPLETED]->(course) edge
+            edges = g.similar.row(you)
+            sims = g.similar.props["similarity"][edges]
+            keep = sims >= p["minSim"]
+            for peer, sim in zip(g.similar.indices[edges][keep].tolist(), sims[keep].tolist()):
+                rows.extend((peer, grade, sim) for grade in takers.get(peer, ()) if grade in grades)
+    rows.sort(key=lambda row: -row[2])
+    return rows
+
+@handles("find_successful_peers_id", "iter_successful_peers_id")
+def _successful_peers(g, query, p):
+    names = g.students.props["name"]
+    return [MemoryRecord(id=g.students.ids[peer], name=names[peer], grade=grade, similarity=sim)
+            for peer, grade, sim in _peer_rows(g, p)]
+
+@handles("find_peers_with_textbooks", "iter_peers_with_textbooks")
+def _peers_with_textbooks(g, query, p):
+    c = g.courses.index.get(p["course_id"])
+    assigned = set(g.assigned.targets(c).tolist()) if c is not None else set()
+    groups = {}  # grouping keys of the aggregation -> distinct textbook names
+    for peer, grade, sim in _peer_rows(g, p):
+        books = groups.setdefault((peer, grade, sim), [])
+        for t in g.interacted.targets(peer).tolist():
+            name = g.textbooks.props["name"][t]
+            if t in assigned and name not in books:
+                books.append(name)
+    names = g.students.props["name"]
+    return [MemoryRecord(id=g.students.ids[peer], name=names[peer], grade=grade, similarity=sim, textbooks=books)
+            for (peer, grade, sim), books in groups.items()]
+
+def _peer_page(g: MemoryGraph, p: dict, rows):
+    """Keyset page of (peer, grade, similarity) rows: ORDER BY similarity DESC, id, grade after $after, LIMIT $limit."""
+    ids = g.students.ids
+    key = lambda row: (-row[2], ids[row[0]], row[1])
+    rows = sorted(rows, key=key)
+    after = p.get("after")
+    if after is not None:
+        last = (-after["similarity"], after["id"], after["grade"])
+        rows = [row for row in rows if key(row) > last]
+    return rows[:p["limit"]]
+
+@handles("find_successful_peers_page")
+def _successful_peers_page(g, query, p):
+    names = g.students.props["name"]
+    return [MemoryRecord(id=g.students.ids[peer], name=names[peer], grade=grade, similarity=sim)
+            for peer, grade, sim in _peer_page(g, p, _peer_rows(g, p))]
+
+@handles("find_peers_with_textbooks_page")
+def _peers_with_textbooks_page(g, query, p):
+    # Same grouping keys as the page order, so paging the groups equals paging before the aggregation
+    groups = {(r["id"], r["grade"], r["similarity"]): r for r in _peers_with_textbooks(g, query, p)}
+    page = _peer_page(g, p, [(g.students.index[sid], grade, sim) for sid, grade, sim in groups])
+    return [groups[(g.students.ids[peer], grade, sim)] for peer, grade, sim in page]
+
+@handles("get_course_cube_rows")
+def _course_cube_rows(g, query, p):
+    if p.get("student_ids") is None:
+        students = range(len(g.students))
+    else:
+        students = [g.students.index[sid] for sid in dict.fromkeys(p["student_ids"]) if sid in g.students.index]
+    out = []
+    for s in students:
+        read = g.interacted.targets(s).tolist()
+        rows = g.completed.row(s)
+        for c, grade in zip(g.completed.indices[rows].tolist(), g.completed.props["grade"][rows]):
+            assigned = set(g.assigned.targets(c).tolist())
+            out.append(MemoryRecord(
+                student_id=g.students.ids[s],
+                learning_style=g.students.props["learningStyle"][s],
+                course_id=g.courses.ids[c],
+                course_name=g.courses.props["name"][c],
+                grade=grade,
+                textbooks=[[g.textbooks.ids[t], g.textbooks.props["name"][t]] for t in read if t in assigned],
+            ))
+    return out
+
+@handles("list_student_names")
+def _student_names(g, query, p):
+    names = g.students.props["name"]
+    return [MemoryRecord(id=student_id, name=names[s]) for s, student_id in enumerate(g.students.ids)]
+
+@handles("find_student_degree")
+def _student_degree(g, query, p):
+    s = g.students.index.get(p["student_id"])
+    if s is None:
+        return []
+    return [MemoryRecord(degree_id=g.degrees.ids[d]) for d in g.degree_of.targets(s).tolist()]
+
+@handles("find_degree_name")
+def _degree_name(g, query, p):
+    d = g.degrees.index.get(p["degree_id"])
+    return [MemoryRecord(degree_name=g.degrees.props["name"][d])] if d is not None else []
+
+@handles("find_alumni_that_finished_from_same_degree", "iter_alumni_that_finished_from_same_degree")
+def _alumni(g, query, p):
+    return [MemoryRecord({"alumni.id": g.students.ids[s]}) for s in g.degree_alumni(p["degree_id"])]
+
+@handles("find_alumni_page")
+def _alumni_page(g, query, p):
+    rows = sorted((g.graduation(s).iso_format(), g.students.ids[s]) for s in g.degree_alumni(p["degree_id"]))
+    after = p.get("after")
+    if after is not None:
+        rows = [row for row in rows if row > (after["graduation"], after["id"])]
+    return [MemoryRecord({"alumni.id": sid, "graduation": Date.from_iso_format(grad)}) for grad, sid in rows[:p["limit"]]]
+
+@handles("find_path_of_alumnus")
+def _path_of_alumnus(g, query, p):
+    s = g.students.index.get(p["student_id"])
+    if s is None:
+        return []
+    rows = g.completed.row(s)
+    return [MemoryRecord(course_id=g.courses.ids[c], term=term)
+            for c, term in zip(g.completed.indices[rows].tolist(), g.completed.props["term"][rows])]
+
+@handles("list_degree_ids")
+def _degree_ids(g, query, p):
+    return [MemoryRecord(degree_id=d) for d in sorted(g.degrees.ids)]
+
+def _gpa(grades):
+    return sum(GRADE_POINTS.get(grade, 0) for grade in grades) / len(grades)
+
+@handles("get_alumni_training_set")
+def _alumni_training_set(g, query, p):
+    alumni = g.degree_alumni(p["degree_id"])
+    if p.get("student_ids") is not None:
+        wanted = set(p["student_ids"])
+        alumni = [s for s in alumni if g.students.ids[s] in wanted]
+    if p.get("graduated_since") is not None:
+        since = np.datetime64(p["graduated_since"], "D")
+        alumni = [s for s in alumni if g.students.props["expectedGraduation"][s] >= since]
+    out = []
+    for s in alumni:
+        rows = g.completed.row(s)
+        if rows.start == rows.stop:
+            continue  # MATCH (s)-[:COMPLETED]->() drops students with no history
+        courses = g.completed.indices[rows].tolist()
+        path = [{"course_id": g.courses.ids[c], "term": term} for c, term in zip(courses, g.completed.props["term"][rows])]
+        record = MemoryRecord(id=g.students.ids[s], path=path, GPA=_gpa(g.completed.props["grade"][rows]))
+        record.update(g.features(s))
+        out.append(record)
+    return out
+
+@handles("get_student_features_from_id")
+def _student_features(g, query, p):
+    s = g.students.index.get(p["student_id"])
+    return [MemoryRecord(g.features(s))] if s is not None else []
+
+@handles("get_students_GPA_from_id")
+def _student_gpa(g, query, p):
+    s = g.students.index.get(p["student_id"])
+    if s is None:
+        return []
+    rows = g.completed.row(s)
+    return [MemoryRecord(GPA=_gpa(g.completed.props["grade"][rows]))] if rows.start != rows.stop else []
+
+@handles("get_students_end_date_from_id")
+def _student_end_date(g, query, p):
+    s = g.students.index.get(p["student_id"])
+    return [MemoryRecord(graduation=g.graduation(s))] if s is not None else []
+
+@handles("course_name_from_id")
+def _course_name(g, query, p):
+    c = g.courses.index.get(p["course_id"])
+    return [MemoryRecord(name=g.courses.props["name"][c])] if c is not None else []
+
+@handles("get_student_profiles")
+def _student_profiles(g, query, p):
+    out = []
+    for key, student_id in p["pairs"]:
+        s = g.students.index.get(student_id)
+        if s is not None:
+            degrees = g.degree_of.targets(s).tolist()
+            record = MemoryRecord(
+                key=key,
+                id=g.students.ids[s],
+                name=g.students.props["name"][s],
+                degree_id=g.degrees.ids[degrees[0]] if degrees else None,
+                completed=[g.courses.ids[c] for c in g.completed.targets(s).tolist()],
+                graduation=g.graduation(s),
+            )
+            record.update(g.features(s))
+            out.append(record)
+    return out
+
+@handles("get_course_catalog")
+def _course_catalog(g, query, p):
+    props = g.courses.props
+    return [MemoryRecord(id=g.courses.ids[c], name=props["name"][c], credits=props["credits"][c],
+                         level=props["level"][c], termAvailability=props["termAvailability"][c],
+                         instructionModes=props["instructionModes"][c])
+            for c in np.argsort(g.courses.ids, kind="stable").tolist()]
+
+@handles("get_graph_data_version")
+def _data_version(g, query, p):
+    return [MemoryRecord(version=g.version)]
+
+class _Summary:
+    # No server round trip: nothing to report beyond the client wall time
+    result_available_after = None
+    result_consumed_after = None
+    profile = None
+    plan = None
+
+class _Result:
+    def __init__(self, records):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def consume(self):
+        return _Summary()
+
+class _Session:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, query_name_=None):
+        return _Result(self._graph.run(query_name_, query, dict(parameters or {})))
+
+class MemoryDriver:
+    """Duck-types the neo4j Driver calls the query layer makes (execute_query, session().run)."""
+
+    # _InstrumentedDriver passes the issuing query function's name, which selects the handler
+    wants_query_name = True
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    def execute_query(self, query, parameters_=None, database_=None, query_name_=None, **kwargs):
+        records = self.graph.run(query_name_, query, dict(parameters_ or {}, **kwargs))
+        return EagerResult(records, _Summary(), list(records[0].keys()) if records else [])
+
+    def session(self, database=None):
+        return _Session(self.graph)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
+
+class _AsyncResult(_Result):
+    async def __aiter__(self):
+        for record in self._records:
+            yield record
+
+    async def consume(self):
+        return _Summary()
+
+class _AsyncSession(_Session):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, parameters=None, query_name_=None):
+        return _AsyncResult(self._graph.run(query_name_, query, dict(parameters or {})))
+
+class AsyncMemoryDriver(MemoryDriver):
+    async def execute_query(self, query, parameters_=None, database_=None, query_name_=None, **kwargs):
+        return MemoryDriver.execute_query(self, query, parameters_, database_, query_name_, **kwargs)
+
+    def session(self, database=None):
+        return _AsyncSession(self.graph)
+
+    async def verify_connectivity(self):
+        pass
+
+    async def close(self):
+        pass
+
+_lock = threading.Lock()
+_graphs = {}
+
+def get_memory_graph(csv_dir: str = None) -> MemoryGraph:
+    """Process-wide graph per CSV directory, loaded on first use."""
+    csv_dir = os.path.abspath(csv_dir or GRAPH_CSV_DIR)
+    with _lock:
+        if csv_dir not in _graphs:
+            _graphs[csv_dir] = MemoryGraph(csv_dir)
+        return _graphs[csv_dir]
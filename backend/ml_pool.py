@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from starlette.concurrency import run_in_threadpool
+
+from artifacts import preload_artifacts
+from course_catalog import get_catalog
+from neo4j_driver import get_shared_driver
+
+# 0 runs recommendation work in-process (threadpool) -- handy for tests and debugging
+ML_POOL_WORKERS = int(os.getenv("ML_POOL_WORKERS", "2"))
+ML_TIMEOUT_SECONDS = float(os.getenv("ML_TIMEOUT_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+def _warm_worker():
+    """Runs once in every worker process: preload artifacts and the course catalog."""
+    artifacts_dir = os.getenv("ML_ARTIFACTS_DIR")
+    try:
+        if artifacts_dir:
+            preload_artifacts(artifacts_dir, get_shared_driver())
+        get_catalog(get_shared_driver())
+    except Exception as e:
+        logger.warning("ML worker %s started without artifacts / course catalog: %s", os.getpid(), e)
+
+def _ping():
+    return os.getpid()
+
+def _unfinished(future) -> bool:
+    """Still queued or running, or lost to a dead worker."""
+    if not future.done():
+        return True
+    return not future.cancelled() and isinstance(future.exception(), BrokenProcessPool)
+
+class _Call:
+    __slots__ = ("fn", "args", "kwargs", "inner", "outer")
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.inner = None  # the executor future currently running the call
+        self.outer = Future()  # what the caller awaits; outlives a recycled executor
+
+class _Slot:
+    """One single-process executor, so a stuck task can be killed without touching the others."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.calls = {}  # outer future -> _Call, in submission order
+        self.executor = self._executor()
+
+    def _executor(self):
+        return ProcessPoolExecutor(max_workers=1, mp_context=self.ctx, initializer=_warm_worker)
+
+    @property
+    def inflight(self) -> int:
+        return len(self.calls)
+
+    def submit(self, fn, *args, **kwargs) -> _Call:
+        if getattr(self.executor, "_broken", False):
+            self.recycle()  # the worker died (e.g. OOM-killed): start a fresh one
+        call = _Call(fn, args, kwargs)
+        self.calls[call.outer] = call
+        self._start(call)
+        return call
+
+    def _start(self, call):
+        inner = call.inner = self.executor.submit(call.fn, *call.args, **call.kwargs)
+        inner.add_done_callback(lambda f: self._settle(call, f))
+
+    @staticmethod
+    def _settle(call, inner):
+        # Ignore executor futures superseded by a re-submission after a recycle
+        if inner is not call.inner or inner.cancelled():
+            return
+        try:
+            if inner.exception() is not None:
+                call.outer.set_exception(inner.exception())
+            else:
+                call.outer.set_result(inner.result())
+        except InvalidStateError:
+            pass  # the caller gave up already
+
+    def done(self, call):
+        self.calls.pop(call.outer, None)
+
+    def abandon(self, call):
+        """Drop a timed-out or cancelled call: unqueue it, or kill its worker if it is running."""
+        # One worker runs calls in submission order, so only the oldest unfinished one is running;
+        # a later one that can no longer be unqueued just runs and has its result dropped
+        running = next((c for c in self.calls.values() if not c.inner.done()), None) is call
+        self.done(call)
+        if call.inner.cancel() or call.inner.done() or not running:
+            return
+        self.recycle()
+
+    def recycle(self):
+        # ProcessPoolExecutor cannot interrupt a running call; terminate the worker instead.
+        # Calls still waiting on this slot move to the replacement first, so they do not
+        # fail with BrokenProcessPool when the old worker goes away.
+        old = self.executor
+        self.executor = self._executor()
+        for call in list(self.calls.values()):
+            if not call.outer.done() and _unfinished(call.inner):
+                self._start(call)
+        for process in list((getattr(old, "_processes", None) or {}).values()):
+            process.terminate()
+        old.shutdown(wait=False, cancel_futures=True)
+        if not self.calls:
+            self.executor.submit(_ping)  # start the replacement warming up right away
+
+class MLPool:
+    """
+    Process pool for CPU-heavy recommendation work so it never occupies the
+    threadpool that serves the cheap endpoints.
+
+    Calls go to the least-busy worker. A call that exceeds its timeout (or whose
+    request is cancelled) is dropped if still queued, or has its worker process
+    terminated and replaced if already running; the calls queued behind it are
+    re-submitted to the replacement. A worker that dies on its own fails its
+    running call with BrokenProcessPool and is replaced on the next submit.
+    """
+
+    def __init__(self, workers: int = ML_POOL_WORKERS, timeout: float = ML_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = []
+
+    def start(self):
+        if self.workers <= 0 or self._slots:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._slots = [_Slot(ctx) for _ in range(self.workers)]
+        # Force every worker to spawn and run its warm-up now rather than on the first request
+        for future in [slot.executor.submit(_ping) for slot in self._slots]:
+            future.result()
+
+    def shutdown(self):
+        for slot in self._slots:
+            slot.executor.shutdown(wait=False, cancel_futures=True)
+        self._slots = []
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots:
+            return await asyncio.wait_for(run_in_threadpool(fn, *args, **kwargs), timeout)
+
+        slot = min(self._slots, key=lambda s: s.inflight)
+        call = slot.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(call.outer), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            slot.abandon(call)
+            raise
+        finally:
+            slot.done(call)
+
+    async def broadcast(self, fn, *args, timeout: float = None, **kwargs):
+        """
+        Run fn once in every worker (or once in-process); returns the list of results.
+        Tracked like run(): a worker that hangs past the timeout is recycled, and a call
+        still queued on a slot recycled for another reason moves to its replacement.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots:
+            return [await asyncio.wait_for(run_in_threadpool(fn, *args, **kwargs), timeout)]
+        calls = [(slot, slot.submit(fn, *args, **kwargs)) for slot in self._slots]
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(call.outer) for slot, call in calls)), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            for slot, call in calls:
+                slot.abandon(call)  # no-op for calls that already finished
+            raise
+        finally:
+            for slot, call in calls:
+                slot.done(call)
+
+ml_pool = MLPool()
@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+
+class ModelCache:
+    """
+    Process-level LRU cache of fitted models.
+
+    Entries are keyed (e.g. by degree_id) and stamped with the data version they
+    were built from; a lookup with a different version drops the entry. The cache
+    is bounded both by entry count and by the total size reported for each model.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (version, model, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key):
+        """(version, model) cached for key regardless of version, without touching LRU order or counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[:2] if entry is not None else None
+
+    def put(self, key, version, model, nbytes: int):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if nbytes > self.max_bytes:
+                # Too big to ever fit; serve it uncached rather than flushing everything
+                return model
+            self._entries[key] = (version, model, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+            return model
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key):
+        version, model, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+peer_models = ModelCache(
+    max_entries=int(os.getenv("ML_CACHE_MAX_MODELS", "32")),
+    max_bytes=int(float(os.getenv("ML_CACHE_MAX_MB", "256")) * 1024 * 1024),
+)
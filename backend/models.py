@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+import os
+
+# Students per /ml/recommendations/batch request; larger cohorts are split by the caller
+ML_BATCH_MAX_STUDENTS = int(os.getenv("ML_BATCH_MAX_STUDENTS", "1000"))
 
 class PeerIn(BaseModel):
     id: str
@@ -36,4 +40,13 @@ class AISummaryResponse(BaseModel):
     summary_md: str
     recommendations: List[str]
     cautions: List[str]
-    actions: List[str]
\ No newline at end of file
+    actions: List[str]
+
+class BatchRecommendationRequest(BaseModel):
+    students: List[str] = Field(..., min_length=1, max_length=ML_BATCH_MAX_STUDENTS)
+    by: str = Field("name", pattern="^(id|name)$")
+    top_k: Optional[int] = Field(None, ge=1)
+    min_support: int = Field(1, ge=1)
+
+class AlumniUpdateRequest(BaseModel):
+    student_ids: List[str] = Field(..., min_length=1)
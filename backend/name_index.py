@@ -0,0 +1,164 @@
+"""
+In-process student and course name indexes, so name -> ID resolution never needs
+a graph round trip and /search can autocomplete and forgive typos:
+
+    exact    dict name -> IDs (case-sensitive, like the Cypher {name: $name} match)
+    prefix   sorted arrays of normalized names and of their later words, bisected
+    fuzzy    trigram postings (CSR), scored by Jaccard similarity of trigram sets
+
+Names are not unique: every lookup returns all IDs sharing a name, in load order.
+Rebuilt when the graph data version moves, like the course catalog and analytics cube.
+"""
+import threading
+from bisect import bisect_left
+from typing import List, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from timing import span
+
+FUZZY_MIN_SCORE = 0.3
+
+def _normalize(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+def _trigrams(normalized: str) -> set:
+    # Per word, padded like pg_trgm: "  ab " -> "  a", " ab", "ab "
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class NameIndex:
+    def __init__(self, ids, names):
+        self._ids_by_name = {}
+        by_key = {}  # normalized name -> [(name, id), ...]
+        for entity_id, name in zip(ids, names):
+            if name is None:
+                continue
+            self._ids_by_name.setdefault(name, []).append(entity_id)
+            by_key.setdefault(_normalize(name), []).append((name, entity_id))
+
+        # Every structure below works on positions in the sorted normalized keys
+        self._keys = sorted(by_key)
+        self._entries = [by_key[key] for key in self._keys]
+        words = sorted((word, k) for k, key in enumerate(self._keys) for word in set(key.split()[1:]))
+        self._words = [word for word, _ in words]
+        self._word_keys = np.asarray([k for _, k in words], dtype=np.int32)
+
+        gram_ids, gram_rows, key_rows = {}, [], []
+        self._gram_count = np.zeros(len(self._keys), dtype=np.int32)
+        for k, key in enumerate(self._keys):
+            grams = _trigrams(key)
+            self._gram_count[k] = len(grams)
+            for gram in grams:
+                gram_rows.append(gram_ids.setdefault(gram, len(gram_ids)))
+                key_rows.append(k)
+        gram_rows = np.asarray(gram_rows, dtype=np.int32)
+        order = np.argsort(gram_rows, kind="stable")
+        self._gram_ids = gram_ids
+        self._postings = np.asarray(key_rows, dtype=np.int32)[order]
+        self._offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_rows, minlength=len(gram_ids)), out=self._offsets[1:])
+
+    def __len__(self):
+        return len(self._ids_by_name)
+
+    def ids(self, name: str) -> List[str]:
+        return self._ids_by_name.get(name, [])
+
+    def id(self, name: str) -> Optional[str]:
+        ids = self._ids_by_name.get(name)
+        return ids[0] if ids else None
+
+    def _prefix_keys(self, normalized: str, limit: int) -> List[int]:
+        start = bisect_left(self._keys, normalized)
+        keys = []
+        for k in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[k].startswith(normalized):
+                break
+            keys.append(k)
+        if len(keys) < limit and " " not in normalized:
+            # Then names with a later word starting with it ("smi" -> "John Smith")
+            start = bisect_left(self._words, normalized)
+            for i in range(start, len(self._words)):
+                if len(keys) >= limit or not self._words[i].startswith(normalized):
+                    break
+                if self._word_keys[i] not in keys:
+                    keys.append(int(self._word_keys[i]))
+        return keys
+
+    def _fuzzy_keys(self, normalized: str, limit: int, min_score: float):
+        grams = _trigrams(normalized)
+        rows = [self._gram_ids[gram] for gram in grams if gram in self._gram_ids]
+        if not rows:
+            return []
+        hits = np.concatenate([self._postings[self._offsets[r]:self._offsets[r + 1]] for r in rows])
+        shared = np.bincount(hits, minlength=len(self._keys))
+        # Jaccard >= min_score needs at least min_score * len(grams) shared trigrams
+        candidates = np.flatnonzero(shared >= max(1, min_score * len(grams) - 1e-9))
+        scores = shared[candidates] / (len(grams) + self._gram_count[candidates] - shared[candidates])
+        keep = scores >= min_score
+        candidates, scores = candidates[keep], scores[keep]
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def search(self, text: str, limit: int = 10, fuzzy: bool = True, min_score: float = FUZZY_MIN_SCORE) -> List[dict]:
+        """Exact (case-insensitive) match first, then prefix matches, then fuzzy matches by score."""
+        normalized = _normalize(text)
+        if not normalized:
+            return []
+        ranked = [(k, "prefix", 1.0) for k in self._prefix_keys(normalized, limit)]
+        if ranked and self._keys[ranked[0][0]] == normalized:
+            ranked[0] = (ranked[0][0], "exact", 1.0)
+        if fuzzy and len(ranked) < limit:
+            seen = {k for k, _, _ in ranked}
+            ranked.extend((k, "fuzzy", score) for k, score in self._fuzzy_keys(normalized, limit, min_score) if k not in seen)
+        results = []
+        for k, match, score in ranked:
+            for name, entity_id in self._entries[k]:
+                results.append({"id": entity_id, "name": name, "match": match, "score": round(score, 3)})
+        return results[:limit]
+
+class NameIndexes:
+    def __init__(self, students: NameIndex, courses: NameIndex, version=None):
+        self.students = students
+        self.courses = courses
+        self.version = version
+
+_lock = threading.Lock()
+_index: Optional[NameIndexes] = None
+
+def get_name_index(neodriver) -> NameIndexes:
+    """Process-wide name indexes, (re)built when missing or when the graph data version moves."""
+    # Imported late: these depend on query_functions, which resolves names through this module
+    from course_catalog import get_catalog
+    from data_version import current_data_version
+    from query_functions import list_student_names
+    global _index
+    with span("names"):
+        version = current_data_version(neodriver)
+        index = _index
+        if index is not None and index.version == version:
+            return index
+        with _lock:
+            if _index is None or _index.version != version:
+                students = list_student_names(neodriver)
+                catalog = get_catalog(neodriver)
+                _index = NameIndexes(
+                    NameIndex([row["id"] for row in students], [row["name"] for row in students]),
+                    NameIndex(catalog.ids, catalog.names),
+                    version=version,
+                )
+            return _index
+
+async def get_name_index_async() -> NameIndexes:
+    """get_name_index for async callers: only leaves the event loop to check a stale version or rebuild."""
+    from data_version import peek_data_version
+    from neo4j_driver import get_shared_driver
+    index = _index
+    if index is not None and index.version == peek_data_version():
+        return index
+    return await run_in_threadpool(lambda: get_name_index(get_shared_driver()))
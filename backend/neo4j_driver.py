@@ -1,33 +1,261 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from dotenv import load_dotenv
 from query_functions import *
+from metrics import Counter, Histogram, DB_HIT_BUCKETS, ROW_BUCKETS
+from memory_graph import AsyncMemoryDriver, MemoryDriver, get_memory_graph
+import timing
 import os
+import random
+import re
+import threading
+import time
 
 
 load_dotenv()
+
+# "neo4j", or "memory" to answer every query from the CSV exports in GRAPH_CSV_DIR (see memory_graph)
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "neo4j")
+
+# Fraction of queries executed under PROFILE to record db hits per operator (0 = off). The sampled
+# query itself is prefixed, not re-run: its request pays PROFILE's overhead and gets the same rows
+PROFILE_SAMPLE_RATE = float(os.getenv("NEO4J_PROFILE_SAMPLE_RATE", "0"))
+
+QUERY_WALL_MS = Histogram("neo4j_query_wall_ms", "Client wall time per query (ms)", ["query"])
+QUERY_AVAILABLE_MS = Histogram("neo4j_query_result_available_after_ms", "Server time until the first record was available (ms)", ["query"])
+QUERY_CONSUMED_MS = Histogram("neo4j_query_result_consumed_after_ms", "Server time to stream the whole result (ms)", ["query"])
+QUERY_ROWS = Histogram("neo4j_query_rows", "Records returned per query", ["query"], buckets=ROW_BUCKETS)
+QUERY_ERRORS = Counter("neo4j_query_errors_total", "Queries that raised", ["query"])
+QUERY_DB_HITS = Histogram("neo4j_query_db_hits", "Total db hits per profiled query", ["query"], buckets=DB_HIT_BUCKETS)
+OPERATOR_DB_HITS = Counter("neo4j_query_operator_db_hits_total", "Db hits per plan operator over profiled queries", ["query", "operator"])
+
+# Statements PROFILE cannot prefix: schema commands, procedure calls, already EXPLAINed/PROFILEd queries
+_UNPROFILABLE = re.compile(r"\s*(EXPLAIN|PROFILE|CALL|SHOW|(CREATE|DROP)(\s+\w+)?\s+(INDEX|CONSTRAINT))\b", re.IGNORECASE)
+
+def _profiled(query: str):
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE and not _UNPROFILABLE.match(query):
+        return "PROFILE " + query.lstrip(), True
+    return query, False
+
+def _operator_hits(plan, totals):
+    operator = plan.get("operatorType", "?").split("@")[0]  # strip the "@neo4j" runtime suffix
+    totals[operator] = totals.get(operator, 0) + plan.get("dbHits", 0)
+    for child in plan.get("children", []):
+        _operator_hits(child, totals)
+    return totals
+
+def _record(name: str, started: float, rows: int, summary, profiled: bool):
+    wall_ms = (time.perf_counter() - started) * 1000
+    QUERY_WALL_MS.observe(wall_ms, query=name)
+    timing.add("db", wall_ms)
+    QUERY_ROWS.observe(rows, query=name)
+    if summary.result_available_after is not None:
+        QUERY_AVAILABLE_MS.observe(summary.result_available_after, query=name)
+    if summary.result_consumed_after is not None:
+        QUERY_CONSUMED_MS.observe(summary.result_consumed_after, query=name)
+    if profiled and summary.profile:
+        totals = _operator_hits(summary.profile, {})
+        QUERY_DB_HITS.observe(sum(totals.values()), query=name)
+        for operator, hits in totals.items():
+            OPERATOR_DB_HITS.inc(hits, query=name, operator=operator)
+
+class _InstrumentedDriver:
+    """
+    Wraps a neo4j Driver so every execute_query / stream_query is timed and
+    counted under query_name_, which every caller passes explicitly (by convention
+    the issuing query function's name; the memory backend dispatches on it).
+    Everything else is passed through to the real driver.
+    """
+
+    def __init__(self, driver):
+        self._inner = driver
+        # The in-memory backend picks its handler by query name; the real driver must not see it
+        self._named = getattr(driver, "wants_query_name", False)
+
+    def __getattr__(self, attr):
+        return getattr(self._inner, attr)
+
+    def execute_query(self, query, parameters_=None, *, query_name_: str, **kwargs):
+        name = query_name_
+        query, profiled = _profiled(query)
+        started = time.perf_counter()
+        try:
+            if self._named:
+                kwargs["query_name_"] = name
+            result = self._inner.execute_query(query, parameters_, **kwargs)
+        except Exception:
+            QUERY_ERRORS.inc(query=name)
+            raise
+        _record(name, started, len(result.records), result.summary, profiled)
+        return result
+
+    def stream_query(self, query, parameters_=None, database_=None, *, query_name_: str, **kwargs):
+        """Like execute_query, but a generator yielding records as the server sends them."""
+        return self._stream(query_name_, query, dict(parameters_ or {}, **kwargs), database_)
+
+    def _stream(self, name, query, params, database):
+        query, profiled = _profiled(query)
+        started = time.perf_counter()
+        rows = 0
+        try:
+            with self._inner.session(database=database) as session:
+                result = session.run(query, params, **({"query_name_": name} if self._named else {}))
+                for record in result:
+                    rows += 1
+                    yield record
+                summary = result.consume()
+        except Exception:
+            QUERY_ERRORS.inc(query=name)
+            raise
+        _record(name, started, rows, summary, profiled)
+
+class _AsyncInstrumentedDriver(_InstrumentedDriver):
+    async def execute_query(self, query, parameters_=None, *, query_name_: str, **kwargs):
+        name = query_name_
+        query, profiled = _profiled(query)
+        started = time.perf_counter()
+        try:
+            if self._named:
+                kwargs["query_name_"] = name
+            result = await self._inner.execute_query(query, parameters_, **kwargs)
+        except Exception:
+            QUERY_ERRORS.inc(query=name)
+            raise
+        _record(name, started, len(result.records), result.summary, profiled)
+        return result
+
+    async def _stream(self, name, query, params, database):
+        query, profiled = _profiled(query)
+        started = time.perf_counter()
+        rows = 0
+        try:
+            async with self._inner.session(database=database) as session:
+                result = await session.run(query, params, **({"query_name_": name} if self._named else {}))
+                async for record in result:
+                    rows += 1
+                    yield record
+                summary = await result.consume()
+        except Exception:
+            QUERY_ERRORS.inc(query=name)
+            raise
+        _record(name, started, rows, summary, profiled)
+
 class Neo4jDriver:
     def __init__(self):
         self._uri = os.getenv("NEO4J_DATABASE_URI")
         self._user = os.getenv("NEO4J_USERNAME")
         self._pwd = os.getenv("NEO4J_PASSWORD")
         self._db = os.getenv("NEO4J_DATABASE")
+        # Connection pool tuning (neo4j driver defaults when unset)
+        self._pool_size = int(os.getenv("NEO4J_MAX_POOL_SIZE") or 100)
+        self._acquisition_timeout = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT") or 60)
+        self._max_lifetime = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME") or 3600)
         self._driver = None
 
     def connect(self):
+        if GRAPH_BACKEND == "memory":
+            self._driver = _InstrumentedDriver(MemoryDriver(get_memory_graph()))
+            return
         if not all([self._uri, self._user, self._pwd]):
             raise ValueError("Neo4j credentials are missing or invalid.")
-        
-        self._driver = GraphDatabase.driver(
-            self._uri, auth=(self._user, self._pwd)
-        )
+
+        self._driver = _InstrumentedDriver(GraphDatabase.driver(
+            self._uri, auth=(self._user, self._pwd),
+            max_connection_pool_size=self._pool_size,
+            connection_acquisition_timeout=self._acquisition_timeout,
+            # Recycle pooled connections before load balancers / servers drop them
+            max_connection_lifetime=self._max_lifetime,
+            keep_alive=True,
+        ))
 
     def close(self):
         if self._driver:
             self._driver.close()
             self._driver = None
 
-    def run(self, query: str, **params):
+    def check_liveness(self):
+        """Round trip to the server; raises if the database cannot be reached."""
+        if not self._driver:
+            raise RuntimeError("Driver not connected. Call connect() first.")
+        self._driver.verify_connectivity()
+
+    def run(self, query: str, query_name_: str = "run", **params):
         if not self._driver:
             raise RuntimeError("Driver not connected. Call connect() first.")
-        result = self._driver.execute_query(query, parameters_=params, database_=self._db)
+        result = self._driver.execute_query(query, parameters_=params, database_=self._db,
+                                            query_name_=query_name_)
         return result
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def get_shared_driver() -> Neo4jDriver:
+    """
+    Process-wide connected driver. The neo4j driver is thread-safe and pools its
+    connections, so every request (and every ML call in a worker process) shares
+    this one instead of paying for routing, TLS and auth on each call.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            driver = Neo4jDriver()
+            driver.connect()
+            _shared = driver
+        return _shared
+
+def close_shared_driver():
+    global _shared
+    with _shared_lock:
+        if _shared is not None:
+            _shared.close()
+            _shared = None
+
+class AsyncNeo4jDriver(Neo4jDriver):
+    """Same configuration as Neo4jDriver, on the asyncio driver (for async endpoints)."""
+
+    def connect(self):
+        if GRAPH_BACKEND == "memory":
+            self._driver = _AsyncInstrumentedDriver(AsyncMemoryDriver(get_memory_graph()))
+            return
+        if not all([self._uri, self._user, self._pwd]):
+            raise ValueError("Neo4j credentials are missing or invalid.")
+
+        self._driver = _AsyncInstrumentedDriver(AsyncGraphDatabase.driver(
+            self._uri, auth=(self._user, self._pwd),
+            max_connection_pool_size=self._pool_size,
+            connection_acquisition_timeout=self._acquisition_timeout,
+            max_connection_lifetime=self._max_lifetime,
+            keep_alive=True,
+        ))
+
+    async def close(self):
+        if self._driver:
+            await self._driver.close()
+            self._driver = None
+
+    async def check_liveness(self):
+        if not self._driver:
+            raise RuntimeError("Driver not connected. Call connect() first.")
+        await self._driver.verify_connectivity()
+
+    async def run(self, query: str, query_name_: str = "run", **params):
+        if not self._driver:
+            raise RuntimeError("Driver not connected. Call connect() first.")
+        return await self._driver.execute_query(query, parameters_=params, database_=self._db,
+                                                query_name_=query_name_)
+
+_shared_async = None
+
+def get_shared_async_driver() -> AsyncNeo4jDriver:
+    """Process-wide async driver; create and use it from the app's event loop only."""
+    global _shared_async
+    if _shared_async is None:
+        driver = AsyncNeo4jDriver()
+        driver.connect()
+        _shared_async = driver
+    return _shared_async
+
+async def close_shared_async_driver():
+    global _shared_async
+    if _shared_async is not None:
+        driver, _shared_async = _shared_async, None
+        await driver.close()
@@ -0,0 +1,136 @@
+import os
+
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+# exact | ivf | auto (ivf once a degree has at least PEER_INDEX_AUTO_ROWS alumni)
+PEER_INDEX = os.getenv("PEER_INDEX", "exact")
+PEER_INDEX_AUTO_ROWS = int(os.getenv("PEER_INDEX_AUTO_ROWS", "50000"))
+# IVF knobs: number of coarse lists (0 = sqrt(n)) and lists scanned per query.
+# More probes -> higher recall, higher latency.
+PEER_INDEX_LISTS = int(os.getenv("PEER_INDEX_LISTS", "0"))
+PEER_INDEX_PROBE = int(os.getenv("PEER_INDEX_PROBE", "8"))
+
+def _normalize(X) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+class ExactIndex:
+    """Brute-force cosine search (the original sklearn path)."""
+
+    def __init__(self, n_neighbors: int = 10):
+        self.n_neighbors = n_neighbors
+        self._nn = None
+
+    def fit(self, X):
+        self._nn = NearestNeighbors(n_neighbors=min(self.n_neighbors, len(X)), metric="cosine")
+        self._nn.fit(X)
+        return self
+
+    def kneighbors(self, X, n_neighbors: int = None):
+        return self._nn.kneighbors(X, n_neighbors=n_neighbors)
+
+    def updated(self, X) -> "ExactIndex":
+        """Index over an updated matrix (brute force has nothing to train)."""
+        return ExactIndex(n_neighbors=self.n_neighbors).fit(X)
+
+    def nbytes(self) -> int:
+        return 0  # sklearn keeps a reference to the model's own matrix
+
+class IVFIndex:
+    """
+    Inverted-file index for cosine similarity.
+
+    Rows are L2-normalised and partitioned by spherical k-means into n_lists
+    coarse cells; a query only scans the n_probe cells whose centroids are
+    closest to it (more if those hold fewer than k rows). Returns cosine
+    distances like ExactIndex, so the two are interchangeable.
+    """
+
+    def __init__(self, n_neighbors: int = 10, n_lists: int = 0, n_probe: int = 8,
+                 n_iter: int = 10, train_size: int = 65536, seed: int = 0):
+        self.n_neighbors = n_neighbors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.train_size = train_size
+        self.seed = seed
+
+    def fit(self, X):
+        Xn = _normalize(X)
+        n = len(Xn)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+
+        sample = Xn[rng.choice(n, size=min(n, max(self.train_size, n_lists)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assign = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+            empty = counts == 0
+            # Re-seed empty cells from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        return self._place(Xn, centroids)
+
+    def _place(self, Xn, centroids):
+        assign = self._assign(Xn, centroids)
+        order = np.argsort(assign, kind="stable")
+        self.centroids = centroids
+        self.ids = order
+        self.vectors = Xn[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids)))))
+        return self
+
+    def updated(self, X) -> "IVFIndex":
+        """Index over an updated matrix, reusing the trained centroids (no k-means pass)."""
+        index = IVFIndex(self.n_neighbors, self.n_lists, self.n_probe, self.n_iter, self.train_size, self.seed)
+        return index._place(_normalize(X), self.centroids)
+
+    @staticmethod
+    def _assign(X, centroids, chunk: int = 65536) -> np.ndarray:
+        out = np.empty(len(X), dtype=np.int64)
+        for start in range(0, len(X), chunk):
+            out[start:start + chunk] = np.argmax(X[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    def kneighbors(self, X, n_neighbors: int = None):
+        k = min(n_neighbors or self.n_neighbors, len(self.ids))
+        Q = _normalize(X)
+        cell_order = np.argsort(-(Q @ self.centroids.T), axis=1)
+        sizes = np.diff(self.offsets)
+
+        distances = np.empty((len(Q), k), dtype=np.float64)
+        indices = np.empty((len(Q), k), dtype=np.int64)
+        for row, (q, cells) in enumerate(zip(Q, cell_order)):
+            # Probe at least n_probe cells, and keep going until k candidates are in hand
+            enough = np.cumsum(sizes[cells]) >= k
+            n_cells = max(self.n_probe, int(np.argmax(enough)) + 1)
+            cells = cells[:n_cells]
+            positions = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells])
+
+            sims = self.vectors[positions] @ q
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top], kind="stable")]
+            distances[row] = 1.0 - sims[top]
+            indices[row] = self.ids[positions[top]]
+        return distances, indices
+
+    def nbytes(self) -> int:
+        return int(self.centroids.nbytes + self.ids.nbytes + self.vectors.nbytes + self.offsets.nbytes)
+
+def make_index(n_rows: int, kind: str = None, n_neighbors: int = 10):
+    kind = kind or PEER_INDEX
+    if kind == "auto":
+        kind = "ivf" if n_rows >= PEER_INDEX_AUTO_ROWS else "exact"
+    if kind == "ivf":
+        return IVFIndex(n_neighbors=n_neighbors, n_lists=PEER_INDEX_LISTS, n_probe=PEER_INDEX_PROBE)
+    if kind == "exact":
+        return ExactIndex(n_neighbors=n_neighbors)
+    raise ValueError(f"Unknown PEER_INDEX backend: {kind}")
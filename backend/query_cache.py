@@ -0,0 +1,167 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import add_collector
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "10000"))
+# 0 turns the cache off (every call goes to Neo4j)
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "1") != "0"
+
+def _canonical(value):
+    """Hashable, order-independent form of a query parameter."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _canonical(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_canonical(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    return value
+
+class QueryCache:
+    """
+    Size-bounded LRU of query results with a per-entry TTL.
+
+    Entries are keyed by (query name, canonicalized params). The whole cache is
+    dropped as soon as a lookup sees a different graph data version, so results
+    never outlive an import. Cached values are shared between callers and must
+    not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.evictions = 0
+
+    def get(self, key, version):
+        """(True, value) on a live hit, else (False, None)."""
+        name = key[0]
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses[name] = self.misses.get(name, 0) + 1
+            return False, None
+
+    def put(self, key, version, value, ttl: float):
+        with self._lock:
+            if version != self._version:
+                return value  # data moved on while the query ran; don't cache a stale result
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "version": self._version,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "evictions": self.evictions,
+            }
+
+    def _sync_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+query_cache = QueryCache(max_entries=QUERY_CACHE_MAX_ENTRIES)
+
+@add_collector
+def _cache_metrics():
+    stats = query_cache.stats()
+    lines = [
+        "# TYPE query_cache_entries gauge", f"query_cache_entries {stats['entries']}",
+        "# TYPE query_cache_evictions_total counter", f"query_cache_evictions_total {stats['evictions']}",
+        "# TYPE query_cache_hits_total counter",
+    ]
+    lines += [f'query_cache_hits_total{{query="{name}"}} {n}' for name, n in sorted(stats["hits"].items())]
+    lines.append("# TYPE query_cache_misses_total counter")
+    lines += [f'query_cache_misses_total{{query="{name}"}} {n}' for name, n in sorted(stats["misses"].items())]
+    return lines
+
+def _data_version(neodriver):
+    # Imported late: data_version depends on query_functions, which uses this module
+    from data_version import current_data_version
+    return current_data_version(neodriver)
+
+async def _data_version_async():
+    from data_version import current_data_version, peek_data_version
+    from neo4j_driver import get_shared_driver
+    version = peek_data_version()
+    if version is None:
+        # Stale stamp: refresh it with the sync driver off the event loop
+        version = await run_in_threadpool(lambda: current_data_version(get_shared_driver()))
+    return version
+
+def cached_query(ttl: float, name: str = None):
+    """
+    Cache a query function's result for ttl seconds (see QueryCache).
+
+    The first argument must be the driver; the remaining arguments form the key.
+    Works on both plain and async query functions. Keys use the function name
+    (or name), so a sync/async twin pair shares entries.
+    QUERY_CACHE_TTL_<NAME> overrides ttl.
+    """
+    def decorate(fn):
+        signature = inspect.signature(fn)
+        query_name = name or fn.__name__
+        entry_ttl = float(os.getenv(f"QUERY_CACHE_TTL_{query_name.upper()}", ttl))
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = list(bound.arguments.items())[1:]  # drop neodriver
+            return (query_name, _canonical(dict(params)))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not QUERY_CACHE_ENABLED:
+                    return await fn(*args, **kwargs)
+                key = key_for(args, kwargs)
+                version = await _data_version_async()
+                hit, value = query_cache.get(key, version)
+                if hit:
+                    return value
+                return query_cache.put(key, version, await fn(*args, **kwargs), entry_ttl)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not QUERY_CACHE_ENABLED:
+                return fn(*args, **kwargs)
+            key = key_for(args, kwargs)
+            version = _data_version(args[0] if args else kwargs["neodriver"])
+            hit, value = query_cache.get(key, version)
+            if hit:
+                return value
+            return query_cache.put(key, version, fn(*args, **kwargs), entry_ttl)
+        return wrapper
+    return decorate
@@ -1,7 +1,16 @@
-def find_successful_peers_id(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
-    
-    records, summary, keys = neodriver._driver.execute_query("""
-    MATCH (you:Student {name: $name})-[yourGrade:COMPLETED]->(course:Course {id: $course_id})
+from utils import sort_courses_dict
+from query_cache import cached_query
+from single_flight import coalesced
+from analytics_cube import get_course_cube
+from name_index import get_name_index
+
+# Result cache lifetimes (seconds); entries are also dropped when the graph data version moves
+ID_TTL = 24 * 3600
+AGGREGATE_TTL = 3600
+
+FIND_SUCCESSFUL_PEERS_QUERY = """
+    MATCH (you:Student)-[yourGrade:COMPLETED]->(course:Course {id: $course_id})
+    WHERE you.id IN $student_ids
     MATCH (you)-[sim:SIMILAR_LEARNING_STYLE]->(peer:Student)-[peerGrade:COMPLETED]->(course)
     WHERE sim.similarity >= $minSim 
     AND peerGrade.grade IN $grades
@@ -10,29 +19,82 @@ def find_successful_peers_id(neodriver, student_name: str, course_id: str, min_s
         peerGrade.grade AS grade,
         sim.similarity AS similarity
     ORDER BY sim.similarity DESC
-    """,
-    name=student_name,
+    """
+
+@coalesced()
+def find_successful_peers_id(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = get_name_index(neodriver).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = neodriver._driver.execute_query(FIND_SUCCESSFUL_PEERS_QUERY,
+    student_ids=student_ids,
     course_id=course_id,
     minSim=min_similarity,
     grades=grades,
+    query_name_="find_successful_peers_id",
     database_=neodriver._db
     )
     return records
 
-def find_course_id_from_name(neodriver, course_name: str):
-    records, summary, keys = neodriver._driver.execute_query("""
-    MATCH (c:Course {name: $course_name})
-    RETURN c.id AS course_id
-    LIMIT 1
-    """,
-    course_name=course_name,
+def iter_successful_peers_id(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = get_name_index(neodriver).students.ids(student_name)
+    if not student_ids:
+        return
+    # Streaming variant: records are yielded as the server sends them, best match first
+    yield from neodriver._driver.stream_query(FIND_SUCCESSFUL_PEERS_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    query_name_="iter_successful_peers_id",
     database_=neodriver._db
     )
-    return records[0]["course_id"] if records else None
 
-def find_peers_with_textbooks(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
-    records, summary, keys = neodriver._driver.execute_query("""
-    MATCH (you:Student {name: $name})-[yourGrade:COMPLETED]->(course:Course {id: $course_id})
+# Keyset pages: $after is the (similarity, id, grade) of the previous page's last row, or null
+PEER_PAGE_SEEK = """
+      AND ($after IS NULL
+           OR sim.similarity < $after.similarity
+           OR (sim.similarity = $after.similarity
+               AND (peer.id > $after.id OR (peer.id = $after.id AND peerGrade.grade > $after.grade))))"""
+
+FIND_SUCCESSFUL_PEERS_PAGE_QUERY = """
+    MATCH (you:Student)-[yourGrade:COMPLETED]->(course:Course {id: $course_id})
+    WHERE you.id IN $student_ids
+    MATCH (you)-[sim:SIMILAR_LEARNING_STYLE]->(peer:Student)-[peerGrade:COMPLETED]->(course)
+    WHERE sim.similarity >= $minSim
+      AND peerGrade.grade IN $grades""" + PEER_PAGE_SEEK + """
+    RETURN peer.id AS id,
+        peer.name AS name,
+        peerGrade.grade AS grade,
+        sim.similarity AS similarity
+    ORDER BY similarity DESC, id, grade
+    LIMIT $limit
+    """
+
+@coalesced()
+def find_successful_peers_page(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+"), limit: int = 50, after=None):
+    student_ids = get_name_index(neodriver).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = neodriver._driver.execute_query(FIND_SUCCESSFUL_PEERS_PAGE_QUERY,
+    student_ids=student_ids,
+    course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    limit=limit,
+    after=after,
+    query_name_="find_successful_peers_page",
+    database_=neodriver._db
+    )
+    return records
+
+def find_course_id_from_name(neodriver, course_name: str):
+    # Resolved from the in-process name index (see name_index); first course with that name
+    return get_name_index(neodriver).courses.id(course_name)
+
+FIND_PEERS_WITH_TEXTBOOKS_QUERY = """
+    MATCH (you:Student)-[yourGrade:COMPLETED]->(course:Course {id: $course_id})
+    WHERE you.id IN $student_ids
     MATCH (you)-[sim:SIMILAR_LEARNING_STYLE]->(peer:Student)-[peerGrade:COMPLETED]->(course)
     WHERE sim.similarity >= $minSim 
       AND peerGrade.grade IN $grades
@@ -43,86 +105,169 @@ def find_peers_with_textbooks(neodriver, student_name: str, course_id: str, min_
            sim.similarity AS similarity,
            collect(DISTINCT textbook.name) AS textbooks
     ORDER BY sim.similarity DESC
-    """,
-    name=student_name,
+    """
+
+@coalesced()
+def find_peers_with_textbooks(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = get_name_index(neodriver).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = neodriver._driver.execute_query(FIND_PEERS_WITH_TEXTBOOKS_QUERY,
+    student_ids=student_ids,
     course_id=course_id,
     minSim=min_similarity,
     grades=grades,
+    query_name_="find_peers_with_textbooks",
     database_=neodriver._db
     )
     return records
 
-def textbooks_popularity_among_courses_groupped_by_grades(neodriver, course_id: str):
-    records, summary, keys = neodriver._driver.execute_query("""
-    // Find how many students (per grade) interacted with each textbook
-    MATCH (c:Course {id: $course_id})<- [g:COMPLETED]-(s:Student)-[:INTERACTED_WITH]->(t:Textbook)<-[:ASSIGNED_TO_A_COURSE]-(c)
-    WITH t, g.grade AS grade, count(DISTINCT s) AS readers
-    // Count total students with that grade in the course
-    MATCH (c:Course {id: $course_id})<- [g2:COMPLETED]-(s2:Student)
-    WITH t, grade, readers, g2.grade AS grade2, count(DISTINCT s2) AS total_students
-    WHERE grade = grade2
-    RETURN t.id AS textbook_id,
-           t.name AS textbook_name,
-           grade,
-           readers,
-           total_students,
-           (toFloat(readers) / total_students) AS proportion
-    ORDER BY grade DESC, readers DESC
-    """,
+def iter_peers_with_textbooks(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+")):
+    student_ids = get_name_index(neodriver).students.ids(student_name)
+    if not student_ids:
+        return
+    yield from neodriver._driver.stream_query(FIND_PEERS_WITH_TEXTBOOKS_QUERY,
+    student_ids=student_ids,
     course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    query_name_="iter_peers_with_textbooks",
     database_=neodriver._db
     )
-    return records
 
-def learner_types_enrolled_in_a_course(neodriver, course_id: str):
-    records, summary, keys = neodriver._driver.execute_query("""
-    MATCH (c:Course {id: $course_id})<- [g:COMPLETED]-(s:Student)
-    WITH c, s.learningStyle AS learning_style, g.grade AS grade, count(DISTINCT s) AS students
-    RETURN c.id AS c_id,
-           c.name AS c_name,
-           grade,
-            learning_style,
-           students
-    ORDER BY grade DESC, learning_style DESC
-    """,
+FIND_PEERS_WITH_TEXTBOOKS_PAGE_QUERY = """
+    MATCH (you:Student)-[yourGrade:COMPLETED]->(course:Course {id: $course_id})
+    WHERE you.id IN $student_ids
+    MATCH (you)-[sim:SIMILAR_LEARNING_STYLE]->(peer:Student)-[peerGrade:COMPLETED]->(course)
+    WHERE sim.similarity >= $minSim
+      AND peerGrade.grade IN $grades""" + PEER_PAGE_SEEK + """
+    OPTIONAL MATCH (peer)-[interactionType:INTERACTED_WITH]->(textbook:Textbook)<-[:ASSIGNED_TO_A_COURSE]-(course)
+    RETURN peer.id AS id,
+           peer.name AS name,
+           peerGrade.grade AS grade,
+           sim.similarity AS similarity,
+           collect(DISTINCT textbook.name) AS textbooks
+    ORDER BY similarity DESC, id, grade
+    LIMIT $limit
+    """
+
+@coalesced()
+def find_peers_with_textbooks_page(neodriver, student_name: str, course_id: str, min_similarity: float = 0.8, grades=("A","A-","B+"), limit: int = 50, after=None):
+    student_ids = get_name_index(neodriver).students.ids(student_name)
+    if not student_ids:
+        return []
+    records, summary, keys = neodriver._driver.execute_query(FIND_PEERS_WITH_TEXTBOOKS_PAGE_QUERY,
+    student_ids=student_ids,
     course_id=course_id,
+    minSim=min_similarity,
+    grades=grades,
+    limit=limit,
+    after=after,
+    query_name_="find_peers_with_textbooks_page",
     database_=neodriver._db
     )
     return records
 
+def textbooks_popularity_among_courses_groupped_by_grades(neodriver, course_id: str):
+    # Served from the materialized course analytics (see analytics_cube)
+    return get_course_cube(neodriver).textbook_popularity(course_id)
+
+def learner_types_enrolled_in_a_course(neodriver, course_id: str):
+    return get_course_cube(neodriver).learner_types(course_id)
+
 def find_student_id(neodriver, student_name: str):
+    return get_name_index(neodriver).students.id(student_name)
+
+def list_student_names(neodriver):
     records, summary, keys = neodriver._driver.execute_query("""
-    MATCH (me:Student {name: $student_name})
-    RETURN me.id as id
+    MATCH (s:Student)
+    RETURN s.id AS id, s.name AS name
     """,
-    student_name=student_name,
+    query_name_="list_student_names",
     database_=neodriver._db
     )
-    return records[0]["id"] if records else None
+    return [dict(record) for record in records]
 
-def find_student_degree(neodriver, student_id: str):
-    records, summary, keys = neodriver._driver.execute_query("""
+FIND_STUDENT_DEGREE_QUERY = """
     // Find the degree(s) of the given student
     MATCH (me:Student {id: $student_id})-[:DEGREE]->(d:Degree)
     RETURN d.id AS degree_id
-    """,
+    """
+
+@cached_query(ttl=ID_TTL)
+@coalesced()
+def find_student_degree(neodriver, student_id: str):
+    records, summary, keys = neodriver._driver.execute_query(FIND_STUDENT_DEGREE_QUERY,
     student_id=student_id,
+    query_name_="find_student_degree",
     database_=neodriver._db
     )
     return records[0]["degree_id"] if records else None
 
-def find_alumni_that_finished_from_same_degree(neodriver, degree_id: str):
-    records, summary, keys = neodriver._driver.execute_query("""
+FIND_DEGREE_NAME_QUERY = """
+    MATCH (d:Degree {id: $degree_id})
+    RETURN d.name AS degree_name
+    """
+
+@coalesced()
+def find_degree_name(neodriver, degree_id: str):
+    records, summary, keys = neodriver._driver.execute_query(FIND_DEGREE_NAME_QUERY,
+    degree_id=degree_id,
+    query_name_="find_degree_name",
+    database_=neodriver._db
+    )
+    return records[0]["degree_name"] if records else None
+
+FIND_ALUMNI_QUERY = """
     MATCH (alumni:Student)-[:DEGREE]->(d:Degree {id: $degree_id})
     WHERE alumni.expectedGraduation < date()
     RETURN alumni.id
     ORDER BY alumni.expectedGraduation
-    """,
+    """
+
+@coalesced()
+def find_alumni_that_finished_from_same_degree(neodriver, degree_id: str):
+    records, summary, keys = neodriver._driver.execute_query(FIND_ALUMNI_QUERY,
     degree_id=degree_id,
+    query_name_="find_alumni_that_finished_from_same_degree",
     database_=neodriver._db
     )
     return [dict(record) for record in records] if records else None
 
+def iter_alumni_that_finished_from_same_degree(neodriver, degree_id: str):
+    for record in neodriver._driver.stream_query(FIND_ALUMNI_QUERY,
+    degree_id=degree_id,
+    query_name_="iter_alumni_that_finished_from_same_degree",
+    database_=neodriver._db
+    ):
+        yield dict(record)
+
+# $after is the (graduation ISO date, id) of the previous page's last alumnus, or null.
+# The page walks the graduation index in sort order from the cursor and stops after $limit
+# alumni of the degree, instead of expanding and sorting the whole degree for every page
+FIND_ALUMNI_PAGE_QUERY = """
+    MATCH (alumni:Student)-[:DEGREE]->(d:Degree {id: $degree_id})
+    USING INDEX alumni:Student(expectedGraduation)
+    WHERE alumni.expectedGraduation < date()
+      AND ($after IS NULL
+           OR alumni.expectedGraduation > date($after.graduation)
+           OR (alumni.expectedGraduation = date($after.graduation) AND alumni.id > $after.id))
+    RETURN alumni.id, alumni.expectedGraduation AS graduation
+    ORDER BY alumni.expectedGraduation, alumni.id
+    LIMIT $limit
+    """
+
+@coalesced()
+def find_alumni_page(neodriver, degree_id: str, limit: int = 50, after=None):
+    records, summary, keys = neodriver._driver.execute_query(FIND_ALUMNI_PAGE_QUERY,
+    degree_id=degree_id,
+    limit=limit,
+    after=after,
+    query_name_="find_alumni_page",
+    database_=neodriver._db
+    )
+    return [dict(record) for record in records]
+
 def find_path_of_alumnus(neodriver, student_id: str):
     records, summary, keys = neodriver._driver.execute_query("""
     MATCH (alumni:Student {id: $student_id})-[rel:COMPLETED]->(c:Course)
@@ -130,10 +275,58 @@ def find_path_of_alumnus(neodriver, student_id: str):
         rel.term AS term
     """,
     student_id=student_id,
+    query_name_="find_path_of_alumnus",
     database_=neodriver._db
     )
     return [dict(record) for record in records] if records else None
 
+def list_degree_ids(neodriver):
+    records, summary, keys = neodriver._driver.execute_query("""
+    MATCH (d:Degree)
+    RETURN d.id AS degree_id
+    ORDER BY degree_id
+    """,
+    query_name_="list_degree_ids",
+    database_=neodriver._db
+    )
+    return [record["degree_id"] for record in records]
+
+def get_alumni_training_set(neodriver, degree_id: str, student_ids=None, graduated_since=None):
+    # One round trip for the whole degree: path, GPA and features per alumnus.
+    # student_ids / graduated_since (ISO date) narrow it to a delta for incremental updates.
+    records, summary, keys = neodriver._driver.execute_query("""
+    MATCH (s:Student)-[:DEGREE]->(d:Degree {id: $degree_id})
+    WHERE s.expectedGraduation < date()
+      AND ($student_ids IS NULL OR s.id IN $student_ids)
+      AND ($graduated_since IS NULL OR s.expectedGraduation >= date($graduated_since))
+    MATCH (s)-[rel:COMPLETED]->(c:Course)
+    WITH s,
+        collect({course_id: c.id, term: rel.term}) AS path,
+        AVG(CASE rel.grade
+            WHEN 'A' THEN 4.0 WHEN 'A-' THEN 3.7
+            WHEN 'B+' THEN 3.3 WHEN 'B' THEN 3.0 WHEN 'B-' THEN 2.7
+            WHEN 'C+' THEN 2.3 WHEN 'C' THEN 2.0 WHEN 'C-' THEN 1.7
+            WHEN 'D+' THEN 1.3 WHEN 'D' THEN 1.0
+            ELSE 0 END) AS GPA
+    RETURN s.id AS id, path, GPA,
+        s.learningStyle, s.preferredCourseLoad, s.preferredPace, s.workHoursPerWeek,
+        s.financialAidStatus, s.preferredInstructionMode
+    ORDER BY s.expectedGraduation
+    """,
+    degree_id=degree_id,
+    student_ids=list(student_ids) if student_ids is not None else None,
+    graduated_since=graduated_since,
+    query_name_="get_alumni_training_set",
+    database_=neodriver._db
+    )
+    alumni = []
+    for record in records:
+        row = dict(record)
+        row["path"] = sort_courses_dict([dict(c) for c in row["path"]])
+        alumni.append(row)
+    return alumni
+
+@cached_query(ttl=AGGREGATE_TTL)
 def get_student_features_from_id(neodriver, student_id: str):
     records, summary, keys = neodriver._driver.execute_query("""
     MATCH (s:Student {id: $student_id})
@@ -141,6 +334,7 @@ def get_student_features_from_id(neodriver, student_id: str):
                 s.financialAidStatus, s.preferredInstructionMode
     """,
     student_id=student_id,
+    query_name_="get_student_features_from_id",
     database_=neodriver._db
     )
     return [dict(record) for record in records] if records else None
@@ -158,6 +352,7 @@ def get_students_GPA_from_id(neodriver, student_id: str):
     RETURN GPA
     """,
     student_id=student_id,
+    query_name_="get_students_GPA_from_id",
     database_=neodriver._db
     )
     return [dict(record) for record in records] if records else None
@@ -168,6 +363,7 @@ def get_students_end_date_from_id(neodriver, student_id: str):
     RETURN s.expectedGraduation as graduation
     """,
     student_id=student_id,
+    query_name_="get_students_end_date_from_id",
     database_=neodriver._db
     )
     return records[0]["graduation"]
@@ -178,7 +374,75 @@ def course_name_from_id(neodriver, course_id: str):
     RETURN c.name as name
     """,
     course_id=course_id,
+    query_name_="course_name_from_id",
     database_=neodriver._db
     )
     return records[0]["name"]
 
+
+def get_student_profiles(neodriver, students, by: str = "name"):
+    # Everything ML needs about a list of target students, in one round trip.
+    # Names are resolved to IDs locally; key is always what the caller passed.
+    students = list(students)
+    if by == "id":
+        pairs = [(key, key) for key in students]
+    else:
+        index = get_name_index(neodriver).students
+        pairs = [(key, student_id) for key in students for student_id in index.ids(key)]
+    if not pairs:
+        return []
+    records, summary, keys = neodriver._driver.execute_query("""
+    UNWIND $pairs AS pair
+    MATCH (s:Student {id: pair[1]})
+    RETURN pair[0] AS key,
+        s.id AS id,
+        s.name AS name,
+        [(s)-[:DEGREE]->(d:Degree) | d.id][0] AS degree_id,
+        [(s)-[:COMPLETED]->(c:Course) | c.id] AS completed,
+        s.expectedGraduation AS graduation,
+        s.learningStyle, s.preferredCourseLoad, s.preferredPace, s.workHoursPerWeek,
+        s.financialAidStatus, s.preferredInstructionMode
+    """,
+    pairs=pairs,
+    query_name_="get_student_profiles",
+    database_=neodriver._db
+    )
+    return [dict(record) for record in records]
+
+def get_course_catalog(neodriver):
+    records, summary, keys = neodriver._driver.execute_query("""
+    MATCH (c:Course)
+    RETURN c.id AS id,
+        c.name AS name,
+        c.credits AS credits,
+        c.level AS level,
+        c.termAvailability AS termAvailability,
+        c.instructionModes AS instructionModes
+    ORDER BY id
+    """,
+    query_name_="get_course_catalog",
+    database_=neodriver._db
+    )
+    return [dict(record) for record in records]
+
+@coalesced()
+def get_graph_data_version(neodriver):
+    # Opaque stamp, set to a new random value by every import: only ever compare it for equality.
+    # Without a marker, fall back to the COMPLETED edge count (count store lookup)
+    records, summary, keys = neodriver._driver.execute_query("""
+    OPTIONAL MATCH (v:DataVersion {id: 'graph'})
+    RETURN v.version AS version
+    """,
+    query_name_="get_graph_data_version",
+    database_=neodriver._db
+    )
+    if records and records[0]["version"] is not None:
+        return str(records[0]["version"])
+    records, summary, keys = neodriver._driver.execute_query("""
+    MATCH ()-[r:COMPLETED]->()
+    RETURN count(r) AS completed
+    """,
+    query_name_="get_graph_data_version",
+    database_=neodriver._db
+    )
+    return f"completed:{records[0]['completed']}" if records else None
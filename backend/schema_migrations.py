@@ -0,0 +1,169 @@
+"""
+Versioned, idempotent schema migrations for the indexes the API's hot queries need.
+
+Applied automatically at API startup (SCHEMA_MIGRATE_ON_STARTUP=0 to skip), or by hand
+from backend/:
+    python -m schema_migrations            # apply pending migrations
+    python -m schema_migrations --check    # fail unless every migrated index is ONLINE and each hot
+                                           # query's plan seeks on the index it is anchored on
+
+The applied version is stored on (:SchemaVersion {id: 'graph'}). Every statement is
+IF NOT EXISTS, so re-running a migration (or two API processes racing) is harmless.
+The constraints and indexes in cypher/data_import.cypher are assumed to exist.
+"""
+import argparse
+import logging
+import re
+import sys
+
+from neo4j_driver import Neo4jDriver
+from query_functions import FIND_ALUMNI_PAGE_QUERY
+
+logger = logging.getLogger(__name__)
+
+# (version, description, statements); append only, never edit an applied entry
+MIGRATIONS = [
+    (1, "graduation range", [
+        "CREATE RANGE INDEX student_expected_graduation IF NOT EXISTS FOR (s:Student) ON (s.expectedGraduation)",
+    ]),
+    (2, "version markers", [
+        "CREATE CONSTRAINT data_version_id IF NOT EXISTS FOR (v:DataVersion) REQUIRE v.id IS UNIQUE",
+        "CREATE CONSTRAINT schema_version_id IF NOT EXISTS FOR (v:SchemaVersion) REQUIRE v.id IS UNIQUE",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Index and constraint names the migrations create
+MIGRATED_INDEXES = [
+    re.match(r"CREATE(?: \w+)? (?:INDEX|CONSTRAINT) (\w+)", statement).group(1)
+    for version, description, statements in MIGRATIONS
+    for statement in statements
+]
+
+# Hot query -> (sample parameters for EXPLAIN, label(property) seeks any one of which must anchor the plan).
+# Only queries served by an index the migrations add are listed: the peer and full alumni queries
+# anchor on the import's uniqueness constraints, which say nothing about the migrations.
+# Values only need the right types.
+HOT_QUERIES = {
+    "find_alumni_page": (FIND_ALUMNI_PAGE_QUERY, {"degree_id": "", "limit": 50, "after": {"graduation": "2024-01-01", "id": ""}}, ("Student(expectedGraduation)",)),
+}
+
+def get_schema_version(neodriver) -> int:
+    records, summary, keys = neodriver._driver.execute_query("""
+    OPTIONAL MATCH (v:SchemaVersion {id: 'graph'})
+    RETURN v.version AS version
+    """,
+    query_name_="get_schema_version",
+    database_=neodriver._db
+    )
+    return records[0]["version"] or 0
+
+def _set_schema_version(neodriver, version: int, description: str):
+    neodriver._driver.execute_query("""
+    MERGE (v:SchemaVersion {id: 'graph'})
+    SET v.version = $version,
+        v.description = $description,
+        v.appliedAt = datetime()
+    """,
+    version=version,
+    description=description,
+    query_name_="_set_schema_version",
+    database_=neodriver._db
+    )
+
+def apply_migrations(neodriver, wait_seconds: int = 300) -> int:
+    """Apply every migration newer than the recorded version; returns the resulting version."""
+    current = get_schema_version(neodriver)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying schema migration %s: %s", version, description)
+        for statement in statements:
+            # Schema and data writes cannot share a transaction: one auto-commit query each
+            neodriver._driver.execute_query(statement, query_name_="apply_migrations", database_=neodriver._db)
+        _set_schema_version(neodriver, version, description)
+        current = version
+    # New indexes populate in the background; seeks only show up in plans once they are online
+    neodriver._driver.execute_query("CALL db.awaitIndexes($seconds)", seconds=wait_seconds, query_name_="apply_migrations", database_=neodriver._db)
+    return current
+
+def _operators(plan):
+    yield plan.get("operatorType", "").split("@")[0], plan.get("args", {}).get("Details", "")
+    for child in plan.get("children", []):
+        yield from _operators(child)
+
+def _seeks(operators):
+    # "UNIQUE course:Course(id) WHERE id = $course_id" -> "Course(id)"
+    return {m.group(1) for op, details in operators if "Seek" in op
+            for m in [re.search(r":(\w+\(\w+\))", details)] if m}
+
+def explain_hot_queries(neodriver):
+    """EXPLAIN every hot query; returns {name: [(plan operator, details)]} without executing anything."""
+    plans = {}
+    for name, (query, params, anchors) in HOT_QUERIES.items():
+        records, summary, keys = neodriver._driver.execute_query("EXPLAIN " + query.lstrip(),
+        parameters_=params,
+        database_=neodriver._db,
+        query_name_=f"explain:{name}",
+        )
+        plans[name] = list(_operators(summary.plan or {}))
+    return plans
+
+def index_states(neodriver, names=MIGRATED_INDEXES):
+    """{index name: state} for the given index names; missing ones are absent."""
+    records, summary, keys = neodriver._driver.execute_query("""
+    SHOW INDEXES YIELD name, state
+    WHERE name IN $names
+    RETURN name, state
+    """,
+    names=list(names),
+    query_name_="index_states",
+    database_=neodriver._db
+    )
+    return {record["name"]: record["state"] for record in records}
+
+def check_index_seeks(neodriver):
+    """
+    Raise RuntimeError unless every index the migrations create is ONLINE and every hot
+    query's plan seeks on one of its expected label(property) indexes (a plan that only
+    scans, or seeks somewhere else, fails the check).
+    """
+    problems = []
+    states = index_states(neodriver)
+    for name in MIGRATED_INDEXES:
+        if states.get(name) != "ONLINE":
+            problems.append(f"index {name} is {states.get(name, 'missing')}")
+    plans = explain_hot_queries(neodriver)
+    for name, operators in plans.items():
+        anchors = HOT_QUERIES[name][2]
+        if not _seeks(operators) & set(anchors):
+            ops = " > ".join(op for op, details in operators)
+            problems.append(f"{name} seeks on none of {', '.join(anchors)}: {ops}")
+    if problems:
+        raise RuntimeError("Schema check failed: " + "; ".join(problems))
+    return plans
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations / check index usage of hot queries.")
+    parser.add_argument("--check", action="store_true", help="only check migrated indexes are ONLINE and the hot queries seek on them")
+    args = parser.parse_args()
+
+    neo = Neo4jDriver()
+    neo.connect()
+    try:
+        if args.check:
+            try:
+                plans = check_index_seeks(neo)
+            except RuntimeError as e:
+                print(e)
+                sys.exit(1)
+            for name, operators in plans.items():
+                print(f"{name}: {' > '.join(op for op, details in operators)} (seeks {', '.join(sorted(_seeks(operators)))})")
+        else:
+            print(f"schema version {apply_migrations(neo)} (latest {SCHEMA_VERSION})")
+    finally:
+        neo.close()
+
+if __name__ == "__main__":
+    main()
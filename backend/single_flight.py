@@ -0,0 +1,118 @@
+"""
+Single-flight request coalescing: concurrent calls with the same key share one
+computation instead of each running it.
+
+The first caller (the leader) runs the function; callers arriving while it is in
+flight wait for its result, or its exception. Nothing is kept once the call ends,
+so unlike query_cache this never serves a result computed before the caller
+arrived. Results are shared between callers and must not be mutated.
+SINGLE_FLIGHT_ENABLED=0 turns coalescing off, for the decorator and direct do()/do_async()
+callers alike.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import threading
+
+from metrics import Counter
+from query_cache import _canonical
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") != "0"
+
+SINGLE_FLIGHT_CALLS = Counter("single_flight_calls_total",
+                              "Calls that ran a computation (leader) or joined one in flight (coalesced)",
+                              ("name", "role"))
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+def _observe(task):
+    # Mark the exception retrieved even when every waiter was cancelled
+    if not task.cancelled():
+        task.exception()
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call (threads)
+        self._tasks = {}  # key -> asyncio.Task (event loop)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) unless a call with key is already running in another thread; then wait for it."""
+        if not SINGLE_FLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        SINGLE_FLIGHT_CALLS.inc(name=key[0], role="leader" if leader else "coalesced")
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn(*args, **kwargs)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) as one shared task per key; a cancelled caller does not cancel it for the others."""
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        leader = task is None or task.get_loop() is not loop
+        if leader:
+            task = self._tasks[key] = loop.create_task(fn(*args, **kwargs))
+            task.add_done_callback(_observe)
+            task.add_done_callback(lambda t: self._tasks.pop(key, None) if self._tasks.get(key) is t else None)
+        SINGLE_FLIGHT_CALLS.inc(name=key[0], role="leader" if leader else "coalesced")
+        return await asyncio.shield(task)
+
+single_flight = SingleFlight()
+
+def coalesced(name: str = None, ignore=("neodriver",)):
+    """
+    Coalesce concurrent calls of a function (plain or async) whose arguments are
+    equal once canonicalized; parameters named in ignore (the driver) are left
+    out of the key. Keys use the function name (or name), like cached_query.
+    """
+    def decorate(fn):
+        signature = inspect.signature(fn)
+        call_name = name or fn.__name__
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k not in ignore}
+            return (call_name, _canonical(params))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not SINGLE_FLIGHT_ENABLED:
+                    return await fn(*args, **kwargs)
+                return await single_flight.do_async(key_for(args, kwargs), fn, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not SINGLE_FLIGHT_ENABLED:
+                return fn(*args, **kwargs)
+            return single_flight.do(key_for(args, kwargs), fn, *args, **kwargs)
+        return wrapper
+    return decorate
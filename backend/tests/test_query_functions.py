@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from query_functions import get_alumni_training_set
+
+class FakeDriver:
+    """Stands in for the neo4j driver: records every execute_query call and returns canned records."""
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def execute_query(self, query, parameters_=None, **kwargs):
+        self.calls.append((query, kwargs))
+        return self.records, None, list(self.records[0]) if self.records else []
+
+def fake_neodriver(records):
+    return SimpleNamespace(_driver=FakeDriver(records), _db="neo4j")
+
+ALUMNUS = {
+    "id": "S1",
+    "path": [
+        {"course_id": "CMSC 341", "term": "Fall2021"},
+        {"course_id": "CMSC 201", "term": "Fall2020"},
+        {"course_id": "CMSC 202", "term": "Spring2021"},
+    ],
+    "GPA": 3.5,
+    "s.learningStyle": "Visual",
+    "s.preferredCourseLoad": 3,
+    "s.preferredPace": "Standard",
+    "s.workHoursPerWeek": 10,
+    "s.financialAidStatus": "Loans",
+    "s.preferredInstructionMode": "Online",
+}
+
+def test_training_set_is_one_query_per_degree():
+    neo = fake_neodriver([ALUMNUS, dict(ALUMNUS, id="S2", path=[])])
+
+    alumni = get_alumni_training_set(neo, "D1")
+
+    assert len(neo._driver.calls) == 1
+    query, params = neo._driver.calls[0]
+    assert params == {"degree_id": "D1", "student_ids": None, "graduated_since": None,
+                      "query_name_": "get_alumni_training_set", "database_": "neo4j"}
+    assert [row["id"] for row in alumni] == ["S1", "S2"]
+    # Path, GPA and the feature columns come back together, the path in term order
+    assert [c["course_id"] for c in alumni[0]["path"]] == ["CMSC 201", "CMSC 202", "CMSC 341"]
+    assert alumni[0]["GPA"] == 3.5
+    assert alumni[0]["s.learningStyle"] == "Visual"
+    assert alumni[1]["path"] == []
+
+def test_training_set_delta_filters():
+    neo = fake_neodriver([])
+
+    assert get_alumni_training_set(neo, "D1", student_ids=("S1", "S2"), graduated_since="2024-05-01") == []
+    query, params = neo._driver.calls[0]
+    assert params["student_ids"] == ["S1", "S2"]
+    assert params["graduated_since"] == "2024-05-01"
@@ -0,0 +1,87 @@
+"""
+Per-request timing spans, sent back as a Server-Timing header and aggregated
+into per-route, per-stage histograms on /metrics.
+
+    with span("query"):
+        ...
+
+Spans only record while a request is being timed (the app's server_timing
+middleware opens one with start_request); anywhere else, or with
+SERVER_TIMING=0, span() returns a shared no-op context. Work done in an ML
+pool worker is timed there with collect() and merged back into the request.
+"""
+import os
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from metrics import Histogram
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "1") != "0"
+
+REQUEST_MS = Histogram("http_request_ms", "Request handling time until the response starts (ms)", ("route",))
+STAGE_MS = Histogram("http_request_stage_ms", "Time per named stage of a request (ms)", ("route", "stage"))
+
+_spans: ContextVar = ContextVar("timing_spans", default=None)
+_NOOP = nullcontext()
+
+class _Span:
+    __slots__ = ("spans", "name", "started")
+
+    def __init__(self, spans, name: str):
+        self.spans = spans
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.spans.append((self.name, (time.perf_counter() - self.started) * 1000))
+        return False
+
+def span(name: str):
+    """Context manager timing one stage of the current request."""
+    spans = _spans.get()
+    return _NOOP if spans is None else _Span(spans, name)
+
+def add(name: str, ms: float):
+    """Record an already measured stage (e.g. a query timed by the driver wrapper)."""
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, ms))
+
+def merge(spans):
+    """Fold spans returned by collect() (from another process) into the current request."""
+    current = _spans.get()
+    if current is not None:
+        current.extend(spans)
+
+def collect(fn, *args, **kwargs):
+    """Run fn with its own span list; returns (result, spans). Picklable, for ml_pool.run."""
+    if not SERVER_TIMING_ENABLED:
+        return fn(*args, **kwargs), []
+    spans = []
+    token = _spans.set(spans)
+    try:
+        return fn(*args, **kwargs), spans
+    finally:
+        _spans.reset(token)
+
+def start_request():
+    """Begin timing the current request; returns the span list to pass to finish_request."""
+    spans = []
+    _spans.set(spans)
+    return spans
+
+def finish_request(route: str, spans, total_ms: float) -> str:
+    """Observe the request's spans and return its Server-Timing header value."""
+    totals = {}
+    for name, ms in list(spans):
+        totals[name] = totals.get(name, 0.0) + ms
+    REQUEST_MS.observe(total_ms, route=route)
+    for name, ms in totals.items():
+        STAGE_MS.observe(ms, route=route, stage=name)
+    entries = [f"{name};dur={ms:.1f}" for name, ms in totals.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
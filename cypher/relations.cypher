@@ -78,4 +78,9 @@ CALL (row) {
   MERGE (s)-[:DEGREE]->(d)
 } IN TRANSACTIONS OF 1000 ROWS;
 
-
+// Data version marker: a fresh value after every import so API-side caches
+// (fitted peer models, ...) know the graph changed. Not a counter: the full
+// import starts with DETACH DELETE, which would reset a counter to the same value
+MERGE (v:DataVersion {id: 'graph'})
+SET v.version = randomUUID(),
+    v.updatedAt = datetime();